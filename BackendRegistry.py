@@ -0,0 +1,39 @@
+from LazyModule import LazyModule
+
+
+class BackendRegistry:
+    """
+    Benchmark backends by name, each with its run function and the driver modules it needs. The
+    drivers are imported only when a backend is loaded for a run, so a missing driver only breaks
+    the backends that use it.
+    """
+
+    def __init__(self):
+        self.backends = {}
+
+    def register(self, name, runner, modules=()):
+        self.backends[name] = (runner, list(modules))
+
+    def load(self, name):
+        """Import the drivers of a backend and return its run function."""
+        if name not in self.backends:
+            raise ValueError(f"Unknown database type: {name}")
+        runner, modules = self.backends[name]
+        for module in modules:
+            try:
+                LazyModule.load(module)
+            except ImportError as e:
+                raise ImportError(f"The {name} backend needs the {module} module: {e}") from e
+        return runner
+
+    def modules(self):
+        return sorted({module for _, modules in self.backends.values() for module in modules})
+
+    def __contains__(self, name):
+        return name in self.backends
+
+    def __iter__(self):
+        return iter(self.backends)
+
+    def __repr__(self):
+        return f"BackendRegistry(backends={list(self.backends)})"
@@ -0,0 +1,55 @@
+import copy
+
+FETCH_MODES = ["none", "first_row", "all", "stream"]
+QUERY_MODES = ["literal", "parameterized", "copy"]
+COPY_BUFFERS = ["stream", "memory"]
+TRANSACTION_MODES = ["single", "commit", "savepoint", "autocommit"]
+MONGO_WRITES = ["insert_many", "bulk"]
+
+
+class BenchmarkOptions:
+    def __init__(self, concurrency=1, target_qps=None, fetch_mode="all", fetch_size=1000,
+                 cassandra_window=None, query_mode="literal", copy_buffer="stream", chunk_rows=None,
+                 chunk_bytes=None, monitor=None, transaction_mode="single",
+                 trace_allocations=False, server_stats=False, mongo_write="insert_many", mongo_raw=False):
+        if fetch_mode not in FETCH_MODES:
+            raise ValueError(f"Unknown fetch mode: {fetch_mode}")
+        if query_mode not in QUERY_MODES:
+            raise ValueError(f"Unknown query mode: {query_mode}")
+        if copy_buffer not in COPY_BUFFERS:
+            raise ValueError(f"Unknown COPY buffer: {copy_buffer}")
+        if transaction_mode not in TRANSACTION_MODES:
+            raise ValueError(f"Unknown transaction mode: {transaction_mode}")
+        if mongo_write not in MONGO_WRITES:
+            raise ValueError(f"Unknown Mongo write mode: {mongo_write}")
+        self.concurrency = concurrency
+        self.target_qps = target_qps
+        self.fetch_mode = fetch_mode
+        self.fetch_size = fetch_size
+        self.cassandra_window = cassandra_window
+        self.query_mode = query_mode
+        self.copy_buffer = copy_buffer
+        self.chunk_rows = chunk_rows
+        self.chunk_bytes = chunk_bytes
+        # RunMonitor for progress and cancellation; not a setting, so it is left out of repr()
+        self.monitor = monitor
+        self.transaction_mode = transaction_mode
+        self.trace_allocations = trace_allocations
+        self.server_stats = server_stats
+        self.mongo_write = mongo_write
+        self.mongo_raw = mongo_raw
+
+    def replace(self, **changes):
+        """Return a copy with the given attributes changed."""
+        options = copy.copy(self)
+        for name, value in changes.items():
+            setattr(options, name, value)
+        return options
+
+    def __repr__(self):
+        return (f"BenchmarkOptions(concurrency={self.concurrency}, target_qps={self.target_qps}, "
+                f"fetch_mode={self.fetch_mode}, fetch_size={self.fetch_size}, cassandra_window={self.cassandra_window}, "
+                f"query_mode={self.query_mode}, copy_buffer={self.copy_buffer}, chunk_rows={self.chunk_rows}, "
+                f"chunk_bytes={self.chunk_bytes}, transaction_mode={self.transaction_mode}, "
+                f"trace_allocations={self.trace_allocations}, server_stats={self.server_stats}, "
+                f"mongo_write={self.mongo_write}, mongo_raw={self.mongo_raw})")
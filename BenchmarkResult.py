@@ -0,0 +1,51 @@
+class BenchmarkResult:
+    def __init__(self, histogram, wall_time, concurrency=1, phases=None, connect_time=0.0, chunk_rows=None,
+                 peak_memory=None, resources=None, errors=0):
+        self.histogram = histogram
+        self.wall_time = wall_time
+        self.concurrency = concurrency
+        self.phases = phases or {}
+        self.connect_time = connect_time
+        # largest write chunk in rows, None when the writes were not split
+        self.chunk_rows = chunk_rows
+        # peak resident memory of the client process during the run in bytes, None when unknown
+        self.peak_memory = peak_memory
+        # client CPU/memory/allocation figures of the timed region, see ResourceUsage.summary()
+        self.resources = resources or {}
+        # iterations that raised; they are not in the histogram
+        self.errors = errors
+        # plans and statement statistics from ServerStats, None unless requested
+        self.server_stats = None
+
+    @property
+    def iterations(self):
+        return self.histogram.total_count
+
+    @property
+    def avg_execution_time(self):
+        """Mean latency in seconds, None when no iteration succeeded."""
+        if not self.iterations:
+            return None
+        return self.histogram.mean
+
+    @property
+    def throughput(self):
+        """Aggregate operations per second across all workers."""
+        if self.wall_time <= 0:
+            return 0.0
+        return self.iterations / self.wall_time
+
+    def percentiles(self):
+        """p50/p90/p99/p99.9/max latency in seconds."""
+        return self.histogram.summary()
+
+    def phase_mean(self, phase):
+        """Average duration of a named phase, or None when the phase was not measured."""
+        histogram = self.phases.get(phase)
+        if histogram is None or not histogram.total_count:
+            return None
+        return histogram.mean
+
+    def __repr__(self):
+        return (f"BenchmarkResult(iterations={self.iterations}, concurrency={self.concurrency}, "
+                f"avg_execution_time={self.avg_execution_time}, throughput={self.throughput})")
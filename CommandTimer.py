@@ -0,0 +1,43 @@
+import threading
+
+from LazyModule import LazyModule
+
+pymongo = LazyModule("pymongo", "monitoring")
+
+
+class CommandTimer:
+    """
+    Time Mongo commands spend between being sent and their reply being read (network plus server),
+    from pymongo's command monitoring. pymongo publishes the events on the thread that runs the
+    command, so every worker thread sums only its own commands: `reset()` before an iteration,
+    `elapsed()` after it. A MongoClient reports to the timer when it is created with
+    `event_listeners=[CommandTimer.listener()]`.
+    """
+
+    local = threading.local()
+
+    @classmethod
+    def listener(cls):
+        class Listener(pymongo.monitoring.CommandListener):
+            def started(self, event):
+                pass
+
+            def succeeded(self, event):
+                cls.add(event.duration_micros)
+
+            def failed(self, event):
+                cls.add(event.duration_micros)
+        return Listener()
+
+    @classmethod
+    def add(cls, duration_micros):
+        cls.local.micros = getattr(cls.local, "micros", 0) + duration_micros
+
+    @classmethod
+    def reset(cls):
+        cls.local.micros = 0
+
+    @classmethod
+    def elapsed(cls):
+        """Seconds spent in commands of this thread since `reset()`."""
+        return getattr(cls.local, "micros", 0) / 1_000_000
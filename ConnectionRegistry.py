@@ -0,0 +1,176 @@
+import itertools
+import threading
+import time
+
+from CommandTimer import CommandTimer
+from LazyModule import LazyModule
+
+cassandra = LazyModule("cassandra", "cluster")
+mariadb = LazyModule("mariadb")
+psycopg2 = LazyModule("psycopg2", "pool")
+pymongo = LazyModule("pymongo")
+
+
+class ConnectionRegistry:
+    """
+    Connections shared by benchmark runs, keyed by backend and Database credentials. PostgreSQL and
+    MariaDB get a connection pool, Mongo a shared MongoClient and Cassandra one session, so repeated
+    runs skip the handshake and topology discovery. `prepare()` creates the pool before a run, so
+    workers only time the checkout; the time spent creating and warming up each pool is kept in
+    `connect_times`.
+
+    A run needing more connections than a pool has gets a new, larger pool; connections and clients
+    still checked out of the old one keep working, and it is closed when the last one is released.
+    """
+
+    pool_names = itertools.count()
+
+    def __init__(self, pool_size=4, warm_up=True):
+        self.pool_size = pool_size
+        self.warm_up = warm_up
+        self.pools = {}
+        self.sizes = {}
+        self.connect_times = {}
+        # checkouts per pool, by id(pool); replaced pools wait in `retired` until theirs are back
+        self.users = {}
+        self.retired = {}
+        # pool each PostgreSQL/MariaDB connection was taken from, by id(connection)
+        self.owners = {}
+        self.lock = threading.Lock()
+
+    def prepare(self, db_type, database, size=1):
+        """
+        Create the pool a run of `size` workers takes its connections from, or grow it; returns the
+        seconds spent on it, None when the existing pool is used.
+        """
+        key = (db_type, database)
+        with self.lock:
+            if key in self.pools and self.sizes[key] >= max(size, self.pool_size):
+                return None
+            self._pool(db_type, database, size)
+            return self.connect_times[key]
+
+    def acquire(self, db_type, database, size=1):
+        """Return a connection for one worker, or the shared client/session for Mongo and Cassandra."""
+        with self.lock:
+            pool = self._pool(db_type, database, size)
+            self.users[id(pool)] = self.users.get(id(pool), 0) + 1
+        try:
+            if db_type == "postgres":
+                connection = pool.getconn()
+            elif db_type == "mariadb":
+                connection = pool.get_connection()
+            else:
+                return pool
+        except Exception:
+            self._checked_in(pool)
+            raise
+        with self.lock:
+            self.owners[id(connection)] = pool
+        return connection
+
+    def release(self, db_type, database, connection):
+        if db_type not in ("postgres", "mariadb"):
+            self._checked_in(connection)
+            return
+        with self.lock:
+            pool = self.owners.pop(id(connection))
+        try:
+            if db_type == "postgres":
+                pool.putconn(connection)
+            else:
+                connection.rollback()
+                connection.close()
+        finally:
+            self._checked_in(pool)
+
+    def _checked_in(self, pool):
+        with self.lock:
+            self.users[id(pool)] -= 1
+            if self.users[id(pool)]:
+                return
+            del self.users[id(pool)]
+            if id(pool) in self.retired:
+                self._close_pool(*self.retired.pop(id(pool)))
+
+    def _pool(self, db_type, database, size):
+        key = (db_type, database)
+        size = max(size, self.pool_size)
+        if key in self.pools and self.sizes[key] >= size:
+            return self.pools[key]
+        if key in self.pools:
+            self._close(key)
+
+        start = time.perf_counter()
+        self.pools[key] = self._create(db_type, database, size)
+        self.sizes[key] = size
+        self.connect_times[key] = time.perf_counter() - start
+        return self.pools[key]
+
+    def _create(self, db_type, database, size):
+        if db_type == "postgres":
+            pool = psycopg2.pool.ThreadedConnectionPool(
+                size if self.warm_up else 1, size, database=database.db_name, user=database.user,
+                password=database.password, host=database.host, port=database.port)
+            if self.warm_up:
+                connections = [pool.getconn() for _ in range(size)]
+                for connection in connections:
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+                    pool.putconn(connection)
+            return pool
+        if db_type == "mariadb":
+            pool = mariadb.ConnectionPool(
+                pool_name=f"benchmark_{next(self.pool_names)}", pool_size=size, user=database.user,
+                password=database.password, host=database.host, port=database.port, database=database.db_name)
+            if self.warm_up:
+                connection = pool.get_connection()
+                connection.ping()
+                connection.close()
+            return pool
+        if db_type == "mongo":
+            client = pymongo.MongoClient(database.host, database.port, maxPoolSize=max(size, 100),
+                                         minPoolSize=size if self.warm_up else 0,
+                                         event_listeners=[CommandTimer.listener()])
+            if self.warm_up:
+                client.admin.command("ping")
+            return client
+        if db_type == "cassandra":
+            cluster = cassandra.cluster.Cluster([database.host], port=database.port)
+            session = cluster.connect()
+            if self.warm_up:
+                session.execute("SELECT release_version FROM system.local")
+            return session
+        raise ValueError(f"Unknown database type: {db_type}")
+
+    def _close(self, key):
+        """Close the pool of `key`, or retire it while some of its connections are checked out."""
+        db_type, _ = key
+        pool = self.pools.pop(key)
+        self.sizes.pop(key)
+        if id(pool) in self.users:
+            self.retired[id(pool)] = (db_type, pool)
+        else:
+            self._close_pool(db_type, pool)
+
+    @staticmethod
+    def _close_pool(db_type, pool):
+        if db_type == "postgres":
+            pool.closeall()
+        elif db_type == "mariadb":
+            pool.close()
+        elif db_type == "mongo":
+            pool.close()
+        elif db_type == "cassandra":
+            pool.cluster.shutdown()
+
+    def close_all(self):
+        with self.lock:
+            for key in list(self.pools):
+                self._close(key)
+            for db_type, pool in self.retired.values():
+                self._close_pool(db_type, pool)
+            self.retired.clear()
+
+    def __repr__(self):
+        return f"ConnectionRegistry(pool_size={self.pool_size}, warm_up={self.warm_up}, pools={list(self.pools)})"
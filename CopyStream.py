@@ -0,0 +1,36 @@
+class CopyStream:
+    """
+    Read-only file-like object that renders rows into PostgreSQL COPY text format lazily, as
+    `cursor.copy_expert` reads it, so the whole payload never has to sit in memory.
+    """
+
+    ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+    def __init__(self, rows):
+        self.lines = (self.format_row(row) for row in rows)
+        self.buffer = ""
+
+    @classmethod
+    def format_row(cls, row):
+        return "\t".join("\\N" if value is None else str(value).translate(cls.ESCAPES) for value in row) + "\n"
+
+    @classmethod
+    def render(cls, rows):
+        """Render all rows up front, for the in-memory buffer variant."""
+        return "".join(cls.format_row(row) for row in rows)
+
+    def read(self, size=-1):
+        chunks = [self.buffer]
+        length = len(self.buffer)
+        while size < 0 or length < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            chunks.append(line)
+            length += len(line)
+        data = "".join(chunks)
+        if size < 0:
+            self.buffer = ""
+            return data
+        self.buffer = data[size:]
+        return data[:size]
@@ -1,9 +1,65 @@
-from datetime_script import generate_timestamp
-from datetime import datetime
+from functools import lru_cache
+
+from datetime_script import generate_datetime, generate_timestamp
+from LazyModule import LazyModule
+from Workload import Workload
+
+bson = LazyModule("bson", "raw_bson")
+
+WORKLOAD_CACHE_SIZE = 16
+
 
 class DataProvider:
     @staticmethod
-    def get_postgres_queries(test_name, records_number):
+    @lru_cache(maxsize=WORKLOAD_CACHE_SIZE)
+    def get_workload(records_number):
+        """Shared Workload for `records_number` records; the most recently used ones stay cached."""
+        return Workload(records_number)
+
+    @staticmethod
+    def _render_inserts(insert, values, chunker=None):
+        """One `INSERT ... VALUES` statement, or a list of statements when a WriteChunker is given."""
+        if chunker is None:
+            return f"""
+                {insert}
+                VALUES {', '.join(values)};
+            """
+        return [f"{insert} VALUES {', '.join(chunk)};" for chunk in chunker.split(values)]
+
+    @staticmethod
+    def _render_batches(statements, chunker=None):
+        """One CQL BATCH of all statements, or a list of BATCHes when a WriteChunker is given."""
+        if chunker is None:
+            return "BEGIN BATCH\n" + "".join(statements) + "APPLY BATCH;"
+        return ["BEGIN BATCH\n" + "".join(chunk) + "APPLY BATCH;" for chunk in chunker.split(statements)]
+
+    @staticmethod
+    def _render_sql_insert_multi(records_number, chunker=None):
+        workload = DataProvider.get_workload(records_number)
+        orders_values = [
+            f"({order_id}, {user_id}, {order_number}, {order_dow}, '{ts}', {days_since_prior})"
+            for order_id, user_id, order_number, order_dow, ts, days_since_prior
+            in workload.orders(timestamps=True)
+        ]
+        orders_products_values = [
+            f"({order_id}, {product_id}, {position}, {reordered})"
+            for order_id, product_id, position, reordered in workload.order_products()
+        ]
+
+        orders = DataProvider._render_inserts(
+            "INSERT INTO orders (order_id, user_id, order_number, order_dow, order_timestamp, days_since_prior_order)",
+            orders_values, chunker)
+        orders_products = DataProvider._render_inserts(
+            "INSERT INTO orders_products (order_id, product_id, add_to_cart_order, reordered)",
+            orders_products_values, chunker)
+        return orders + orders_products
+
+    @staticmethod
+    def get_postgres_queries(test_name, records_number, chunker=None):
+        """
+        Literal SQL for a test. With a WriteChunker, insert tests return a list of statements, each
+        within the chunker's row and byte limits.
+        """
         if test_name == "select_join":
             return f"""
                 SELECT o.order_id, o.user_id, o.order_number, 
@@ -29,46 +85,11 @@ class DataProvider:
                 LIMIT {records_number}
             """
         elif test_name == "insert_base":
-            values_list = []
-            for i in range(1, records_number + 1):
-                user_id = 300000 + i
-                values_list.append(f"('User{user_id}')")
-
-            batch_query = f"""
-                INSERT INTO users (name)
-                VALUES {', '.join(values_list)};
-            """
-            return batch_query
+            workload = DataProvider.get_workload(records_number)
+            values = [f"('{name}')" for name in workload.user_names]
+            return DataProvider._render_inserts("INSERT INTO users (name)", values, chunker)
         elif test_name == "insert_multi":
-            orders_values = []
-            orders_products_values = []
-
-            for i in range(1, records_number + 1):
-                user_id = 300000 + i
-                order_id = 5000000 + i
-                order_number = i
-                order_dow = i % 7
-                ts = generate_timestamp(i % 24, i % 30)
-                days_since_prior = i % 30
-
-                orders_values.append(
-                    f"({order_id}, {user_id}, {order_number}, {order_dow}, '{ts}', {days_since_prior})"
-                )
-
-                for j in range(1, min(3, records_number + 1)):
-                    product_id = 50000 + i
-                    orders_products_values.append(
-                        f"({order_id}, {product_id}, {j}, {i % 2})"
-                    )
-
-            batch_query = f"""
-                INSERT INTO orders (order_id, user_id, order_number, order_dow, order_timestamp, days_since_prior_order)
-                VALUES {', '.join(orders_values)};
-
-                INSERT INTO orders_products (order_id, product_id, add_to_cart_order, reordered)
-                VALUES {', '.join(orders_products_values)};
-            """
-            return batch_query
+            return DataProvider._render_sql_insert_multi(records_number, chunker)
         elif test_name == "update_base":
             return f"""
                 UPDATE aisles
@@ -92,7 +113,7 @@ class DataProvider:
         return ""
 
     @staticmethod
-    def get_mariadb_queries(test_name, records_number):
+    def get_mariadb_queries(test_name, records_number, chunker=None):
         if test_name == "select" or test_name == "select_join":
             return f"""
                 SELECT o.order_id, o.user_id, o.order_number, 
@@ -118,46 +139,11 @@ class DataProvider:
                 LIMIT {records_number}
             """
         elif test_name == "insert_base":
-            values_list = []
-            for i in range(1, records_number + 1):
-                user_id = 300000 + i
-                values_list.append(f"({user_id}, 'User{user_id}')")
-
-            batch_query = f"""
-                INSERT INTO users (user_id, name)
-                VALUES {', '.join(values_list)};
-            """
-            return batch_query
+            workload = DataProvider.get_workload(records_number)
+            values = [f"({user_id}, '{name}')" for user_id, name in zip(workload.user_ids, workload.user_names)]
+            return DataProvider._render_inserts("INSERT INTO users (user_id, name)", values, chunker)
         elif test_name == "insert_multi":
-            orders_values = []
-            orders_products_values = []
-
-            for i in range(1, records_number + 1):
-                user_id = 300000 + i
-                order_id = 5000000 + i
-                order_number = i
-                order_dow = i % 7
-                ts = generate_timestamp(i % 24, i % 30)
-                days_since_prior = i % 30
-
-                orders_values.append(
-                    f"({order_id}, {user_id}, {order_number}, {order_dow}, '{ts}', {days_since_prior})"
-                )
-
-                for j in range(1, min(3, records_number + 1)):
-                    product_id = 50000 + i
-                    orders_products_values.append(
-                        f"({order_id}, {product_id}, {j}, {i % 2})"
-                    )
-
-            batch_query = f"""
-                INSERT INTO orders (order_id, user_id, order_number, order_dow, order_timestamp, days_since_prior_order)
-                VALUES {', '.join(orders_values)};
-
-                INSERT INTO orders_products (order_id, product_id, add_to_cart_order, reordered)
-                VALUES {', '.join(orders_products_values)};
-            """
-            return batch_query
+            return DataProvider._render_sql_insert_multi(records_number, chunker)
         elif test_name == "update_base":
             return f"""
                 UPDATE aisles
@@ -181,7 +167,156 @@ class DataProvider:
         return ""
 
     @staticmethod
-    def get_mongo_queries(test_name, records_number):
+    def get_postgres_statements(test_name, records_number):
+        """
+        Parameterized variant of get_postgres_queries: a list of `(template, params)` pairs. `params`
+        is a list of parameter tuples; a single tuple is run with execute(), several go through
+        execute_values (templates with `VALUES %s`) or executemany.
+        """
+        if test_name == "select_join":
+            return [("""
+                SELECT o.order_id, o.user_id, o.order_number, 
+                       p.product_id, p.product_name, p.department_id,
+                       op.add_to_cart_order, op.reordered
+                FROM orders o
+                JOIN orders_products op ON o.order_id = op.order_id
+                JOIN products p ON op.product_id = p.product_id
+                LIMIT %s
+            """, [(records_number,)])]
+        elif test_name == "select_base":
+            return [("""
+                SELECT order_id, user_id, order_number, order_dow, order_timestamp, days_since_prior_order
+                FROM orders
+                LIMIT %s
+            """, [(records_number,)])]
+        elif test_name == "select_date":
+            return [("""
+                SELECT order_id, user_id, order_number, order_timestamp
+                FROM orders
+                WHERE order_timestamp >= %s
+                LIMIT %s
+            """, [(generate_datetime(1, 1), records_number)])]
+        elif test_name == "insert_base":
+            users = [(name,) for name in DataProvider.get_workload(records_number).user_names]
+            return [("INSERT INTO users (name) VALUES %s", users)]
+        elif test_name == "insert_multi":
+            workload = DataProvider.get_workload(records_number)
+            orders = workload.orders()
+            orders_products = workload.order_products()
+
+            return [
+                ("""
+                    INSERT INTO orders (order_id, user_id, order_number, order_dow, order_timestamp, days_since_prior_order)
+                    VALUES %s
+                """, orders),
+                ("""
+                    INSERT INTO orders_products (order_id, product_id, add_to_cart_order, reordered)
+                    VALUES %s
+                """, orders_products)
+            ]
+        elif test_name == "update_base":
+            return [("UPDATE aisles SET aisle = %s WHERE aisle_id BETWEEN 1 AND %s",
+                     [("Updated Aisle", records_number)])]
+        elif test_name == "delete_base":
+            return [("DELETE FROM orders WHERE order_id BETWEEN 1 AND %s", [(records_number,)])]
+        elif test_name == "delete_multi":
+            return [
+                ("DELETE FROM orders_products WHERE order_id BETWEEN 1 AND %s", [(records_number,)]),
+                ("DELETE FROM orders WHERE order_id BETWEEN 1 AND %s", [(records_number,)])
+            ]
+
+        return []
+
+    @staticmethod
+    def get_postgres_copy(test_name, records_number):
+        """
+        COPY variant of the PostgreSQL insert tests: a list of `(copy_sql, rows)` pairs to stream
+        through `COPY ... FROM STDIN`. Empty for tests that have no COPY form.
+        """
+        if test_name == "insert_base":
+            users = [(name,) for name in DataProvider.get_workload(records_number).user_names]
+            return [("COPY users (name) FROM STDIN", users)]
+        elif test_name == "insert_multi":
+            workload = DataProvider.get_workload(records_number)
+            orders = workload.orders(timestamps=True)
+            orders_products = workload.order_products()
+
+            return [
+                ("COPY orders (order_id, user_id, order_number, order_dow, order_timestamp, days_since_prior_order) "
+                 "FROM STDIN", orders),
+                ("COPY orders_products (order_id, product_id, add_to_cart_order, reordered) FROM STDIN",
+                 orders_products)
+            ]
+
+        return []
+
+    @staticmethod
+    def get_mariadb_statements(test_name, records_number):
+        """
+        Parameterized variant of get_mariadb_queries: a list of `(template, params)` pairs using `?`
+        placeholders. A single parameter tuple is run with execute(), several with executemany.
+        """
+        if test_name == "select" or test_name == "select_join":
+            return [("""
+                SELECT o.order_id, o.user_id, o.order_number, 
+                       p.product_id, p.product_name, p.department_id,
+                       op.add_to_cart_order, op.reordered
+                FROM orders o
+                JOIN orders_products op ON o.order_id = op.order_id
+                JOIN products p ON op.product_id = p.product_id
+                LIMIT ?
+            """, [(records_number,)])]
+        elif test_name == "select_base":
+            return [("""
+                SELECT order_id, user_id, order_number, order_dow, order_timestamp, days_since_prior_order
+                FROM orders
+                LIMIT ?
+            """, [(records_number,)])]
+        elif test_name == "select_date":
+            return [("""
+                SELECT order_id, user_id, order_number, order_timestamp
+                FROM orders
+                WHERE order_timestamp >= ?
+                LIMIT ?
+            """, [(generate_datetime(1, 1), records_number)])]
+        elif test_name == "insert_base":
+            workload = DataProvider.get_workload(records_number)
+            users = list(zip(workload.user_ids, workload.user_names))
+            return [("INSERT INTO users (user_id, name) VALUES (?, ?)", users)]
+        elif test_name == "insert_multi":
+            workload = DataProvider.get_workload(records_number)
+            orders = workload.orders()
+            orders_products = workload.order_products()
+
+            return [
+                ("""
+                    INSERT INTO orders (order_id, user_id, order_number, order_dow, order_timestamp, days_since_prior_order)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, orders),
+                ("""
+                    INSERT INTO orders_products (order_id, product_id, add_to_cart_order, reordered)
+                    VALUES (?, ?, ?, ?)
+                """, orders_products)
+            ]
+        elif test_name == "update_base":
+            return [("UPDATE aisles SET aisle = ? WHERE aisle_id BETWEEN 1 AND ?",
+                     [("Updated Aisle", records_number)])]
+        elif test_name == "delete_base":
+            return [("DELETE FROM orders WHERE order_id BETWEEN 1 AND ?", [(records_number,)])]
+        elif test_name == "delete_multi":
+            return [
+                ("DELETE FROM orders_products WHERE order_id BETWEEN 1 AND ?", [(records_number,)]),
+                ("DELETE FROM orders WHERE order_id BETWEEN 1 AND ?", [(records_number,)])
+            ]
+
+        return []
+
+    @staticmethod
+    def get_mongo_queries(test_name, records_number, chunker=None):
+        """
+        A `(collection, operation, params, limit)` query. With a WriteChunker, insert tests return a
+        list of such queries, one insert_many per chunk of documents.
+        """
         queries = []
 
         if test_name == "select_base":
@@ -216,10 +351,9 @@ class DataProvider:
                 ]], None)
 
         elif test_name == "select_date":
-            ts = generate_timestamp(1, 1, True)
             query = ("orders", "find", [{
                 "order_datetime": {
-                    "$gte": datetime.fromtimestamp(ts)
+                    "$gte": generate_datetime(1, 1)
                 }
             }, {
                 "user_id": 1,
@@ -230,49 +364,31 @@ class DataProvider:
             return query
 
         elif test_name == "insert_base":
-            users = []
-            for i in range(1, records_number + 1):
-                user_id = 300000 + i
-                users.append({
-                    "user_id": user_id,
-                    "name": f"User{user_id}"
-                })
-
-            query = ("users", "insert_many", [users], None)
-            return query
+            workload = DataProvider.get_workload(records_number)
+            users = [{"user_id": user_id, "name": name}
+                     for user_id, name in zip(workload.user_ids, workload.user_names)]
+
+            return DataProvider._chunk_documents("users", users, chunker)
         
         elif test_name == "insert_multi":
-            orders = []
-
-            for i in range(1, records_number + 1):
-                ts = generate_timestamp(i % 24, i % 30, True)
-                order_id = 5000000 + i
-                user_id = 300000 + i
-
-                order = {
-                    "order_id": order_id,
-                    "user_id": user_id,
-                    "order_number": i,
-                    "order_dow": i % 7,
-                    "order_datetime": datetime.fromtimestamp(ts),
-                    "days_since_prior_order": i % 30,
-                    "products": []
-                }
-
-                for j in range(1, min(3, records_number + 1)):
-                    product_id = 50000 + j
-                    product = {
-                        "product_id": product_id,
-                        "product_name": f"Product {chr(64 + j)}",
-                        "add_to_cart_order": j,
-                        "reordered": i % 2
-                    }
-                    order["products"].append(product)
-
-                orders.append(order)
-
-            query = ("orders", "insert_many", [orders], None)
-            return query
+            workload = DataProvider.get_workload(records_number)
+            orders = [{
+                "order_id": order_id,
+                "user_id": user_id,
+                "order_number": order_number,
+                "order_dow": order_dow,
+                "order_datetime": order_datetime,
+                "days_since_prior_order": days_since_prior,
+                "products": [{
+                    "product_id": 50000 + j,
+                    "product_name": f"Product {chr(64 + j)}",
+                    "add_to_cart_order": j,
+                    "reordered": reordered
+                } for j in workload.positions]
+            } for (order_id, user_id, order_number, order_dow, order_datetime, days_since_prior), reordered
+                in zip(workload.orders(), workload.reordered)]
+
+            return DataProvider._chunk_documents("orders", orders, chunker)
 
         elif test_name == "update_base":
             query = (
@@ -298,7 +414,33 @@ class DataProvider:
         return queries
 
     @staticmethod
-    def get_cassandra_queries(test_name, records_number=1):
+    def _chunk_documents(collection_name, documents, chunker=None):
+        if chunker is None:
+            return (collection_name, "insert_many", [documents], None)
+        # documents of one workload have nearly the same size, so one encoding is a good estimate
+        document_bytes = len(bson.encode(documents[0])) if documents else 0
+        return [(collection_name, "insert_many", [chunk], None)
+                for chunk in chunker.split(documents, size=lambda document: document_bytes)]
+
+    @staticmethod
+    def encode_mongo_documents(queries):
+        """
+        The documents of insert queries encoded to RawBSONDocument, so the driver sends them as they
+        are instead of encoding them during the run. Other queries are returned unchanged.
+        """
+        single = not isinstance(queries, list)
+        encoded = [(collection_name, operation,
+                    [[bson.raw_bson.RawBSONDocument(bson.encode(document)) for document in params[0]]], limit)
+                   if operation == "insert_many" else (collection_name, operation, params, limit)
+                   for collection_name, operation, params, limit in ([queries] if single else queries)]
+        return encoded[0] if single else encoded
+
+    @staticmethod
+    def get_cassandra_queries(test_name, records_number=1, chunker=None):
+        """
+        Literal CQL for a test. With a WriteChunker, write tests return a list of BATCH statements,
+        each within the chunker's limits; the statements of one order stay in the same batch.
+        """
         if test_name == "select_base":
             return f"""
                 SELECT order_id, user_id, order_number, order_dow, order_timestamp, days_since_prior_order
@@ -325,31 +467,23 @@ class DataProvider:
             """
 
         elif test_name == "insert_base":
-            batch_query = "BEGIN BATCH\n"
-            for i in range(1, records_number + 1):
-                user_id = 300000 + i
-                batch_query += f"""
+            workload = DataProvider.get_workload(records_number)
+            inserts = [f"""
                     INSERT INTO instacart.users (
                         user_id, name
                     )
                     VALUES (
-                        {user_id}, 'User{user_id}'
+                        {user_id}, '{name}'
                     );
-                """
-            batch_query += "APPLY BATCH;"
-            return batch_query
+                """ for user_id, name in zip(workload.user_ids, workload.user_names)]
+            return DataProvider._render_batches(inserts, chunker)
 
         elif test_name == "insert_multi":
-            batch_query = "BEGIN BATCH\n"
-            for i in range(1, records_number + 1):
-                user_id = 300000 + i
-                order_id = 5000000 + i
-                order_number = i
-                order_dow = i % 7
-                ts = generate_timestamp(i % 24, i % 30)
-                days_since_prior = i % 30
-
-                batch_query += f"""
+            workload = DataProvider.get_workload(records_number)
+            orders = []
+            for (order_id, user_id, order_number, order_dow, ts, days_since_prior), reordered in zip(
+                    workload.orders(timestamps=True), workload.reordered):
+                parts = [f"""
                     INSERT INTO instacart.orders (
                         order_id, user_id, order_number, order_dow,
                         order_timestamp, days_since_prior_order
@@ -358,21 +492,21 @@ class DataProvider:
                         {order_id}, {user_id}, {order_number}, {order_dow},
                         '{ts}', {days_since_prior}
                     );
-                """
+                """]
 
-                batch_query += f"""
+                parts.append(f"""
                     INSERT INTO instacart.orders_by_timestamp (
                         order_timestamp, order_id, user_id, order_number
                     )
                     VALUES (
                         '{ts}', {order_id}, {user_id}, {order_number}
                     );
-                """
+                """)
 
-                for j in range(1, min(3, records_number + 1)):
-                    product_id = 50000 + i
-                    product_name = f"Product {i}-{j}"
-                    batch_query += f"""
+                for j in workload.positions:
+                    product_id = 50000 + order_number
+                    product_name = f"Product {order_number}-{j}"
+                    parts.append(f"""
                         INSERT INTO instacart.order_products_by_order (
                             order_id, product_id, user_id, order_number, order_dow,
                             order_timestamp, days_since_prior_order,
@@ -381,59 +515,131 @@ class DataProvider:
                         VALUES (
                             {order_id}, {product_id}, {user_id}, {order_number}, {order_dow},
                             '{ts}', {days_since_prior},
-                            '{product_name}', {j}, {i % 2}
+                            '{product_name}', {j}, {reordered}
                         );
-                    """
-            batch_query += "APPLY BATCH;"
-            return batch_query
+                    """)
+                orders.append("".join(parts))
+            return DataProvider._render_batches(orders, chunker)
 
         elif test_name == "update_base":
-            batch_query = "BEGIN BATCH\n"
-
             aisle_ids = [i % 100 for i in range(1, records_number + 1)]
             unique_aisle_ids = list(set(aisle_ids))
 
-            for aisle_id in unique_aisle_ids:
-                batch_query += f"""
+            updates = [f"""
                     UPDATE instacart.aisles
                     SET aisle = 'Updated Aisle'
                     WHERE aisle_id = {aisle_id};
-                """
-            batch_query += "APPLY BATCH;"
-            return batch_query
+                """ for aisle_id in unique_aisle_ids]
+            return DataProvider._render_batches(updates, chunker)
 
         elif test_name == "delete_base":
-            batch_query = "BEGIN BATCH\n"
-
-            order_ids = list(range(1, records_number + 1))
-
-            for order_id in order_ids:
-                batch_query += f"""
+            deletes = [f"""
                     DELETE FROM instacart.orders
                     WHERE order_id = {order_id};
-                """
-            batch_query += "APPLY BATCH;"
-            return batch_query
+                """ for order_id in range(1, records_number + 1)]
+            return DataProvider._render_batches(deletes, chunker)
 
         elif test_name == "delete_multi":
-            batch_query = "BEGIN BATCH\n"
-
-            order_ids = list(range(1, records_number + 1))
-
-            for order_id in order_ids:
-                batch_query += f"""
+            deletes = [f"""
                     DELETE FROM instacart.order_products_by_order
                     WHERE order_id = {order_id};
-                """
-                batch_query += f"""
+                """ + f"""
                     DELETE FROM instacart.orders_by_timestamp
                     WHERE order_id = {order_id};
-                """
-                batch_query += f"""
+                """ + f"""
                     DELETE FROM instacart.orders
                     WHERE order_id = {order_id};
-                """
-            batch_query += "APPLY BATCH;"
-            return batch_query
+                """ for order_id in range(1, records_number + 1)]
+            return DataProvider._render_batches(deletes, chunker)
 
         return ""
+
+    @staticmethod
+    def get_cassandra_statements(test_name, records_number=1):
+        """
+        Parameterized variant of get_cassandra_queries: a list of `(template, params)` pairs meant for
+        prepared statements. Instead of one big BATCH, writes carry one parameter tuple per row.
+        """
+        if test_name == "select_base":
+            return [("""
+                SELECT order_id, user_id, order_number, order_dow, order_timestamp, days_since_prior_order
+                FROM instacart.orders
+                LIMIT ?
+            """, [(records_number,)])]
+
+        elif test_name == "select_join":
+            return [("""
+                SELECT order_id, user_id, order_number, order_dow, 
+                       order_timestamp, product_id, product_name,
+                       add_to_cart_order, reordered
+                FROM instacart.order_products_by_order
+                LIMIT ?
+            """, [(records_number,)])]
+
+        elif test_name == "select_date":
+            return [("""
+                SELECT order_id, user_id, order_number, order_timestamp
+                FROM instacart.orders_by_timestamp
+                WHERE order_timestamp >= ?
+                LIMIT ? ALLOW FILTERING
+            """, [(generate_datetime(1, 1), records_number)])]
+
+        elif test_name == "insert_base":
+            workload = DataProvider.get_workload(records_number)
+            users = list(zip(workload.user_ids, workload.user_names))
+            return [("INSERT INTO instacart.users (user_id, name) VALUES (?, ?)", users)]
+
+        elif test_name == "insert_multi":
+            workload = DataProvider.get_workload(records_number)
+            orders = workload.orders()
+            orders_by_timestamp = [(ts, order_id, user_id, order_number)
+                                   for order_id, user_id, order_number, _, ts, _ in orders]
+            order_products = []
+            for row, position in zip(workload.line_rows, workload.line_positions):
+                order_id, user_id, order_number, order_dow, ts, days_since_prior = orders[row]
+                order_products.append((order_id, 50000 + order_number, user_id, order_number, order_dow, ts,
+                                       days_since_prior, f"Product {order_number}-{position}", position,
+                                       workload.reordered[row]))
+
+            return [
+                ("""
+                    INSERT INTO instacart.orders (
+                        order_id, user_id, order_number, order_dow,
+                        order_timestamp, days_since_prior_order
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, orders),
+                ("""
+                    INSERT INTO instacart.orders_by_timestamp (
+                        order_timestamp, order_id, user_id, order_number
+                    )
+                    VALUES (?, ?, ?, ?)
+                """, orders_by_timestamp),
+                ("""
+                    INSERT INTO instacart.order_products_by_order (
+                        order_id, product_id, user_id, order_number, order_dow,
+                        order_timestamp, days_since_prior_order,
+                        product_name, add_to_cart_order, reordered
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, order_products)
+            ]
+
+        elif test_name == "update_base":
+            aisle_ids = sorted({i % 100 for i in range(1, records_number + 1)})
+            return [("UPDATE instacart.aisles SET aisle = ? WHERE aisle_id = ?",
+                     [("Updated Aisle", aisle_id) for aisle_id in aisle_ids])]
+
+        elif test_name == "delete_base":
+            return [("DELETE FROM instacart.orders WHERE order_id = ?",
+                     [(order_id,) for order_id in range(1, records_number + 1)])]
+
+        elif test_name == "delete_multi":
+            order_ids = [(order_id,) for order_id in range(1, records_number + 1)]
+            return [
+                ("DELETE FROM instacart.order_products_by_order WHERE order_id = ?", order_ids),
+                ("DELETE FROM instacart.orders_by_timestamp WHERE order_id = ?", order_ids),
+                ("DELETE FROM instacart.orders WHERE order_id = ?", order_ids)
+            ]
+
+        return []
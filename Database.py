@@ -6,5 +6,14 @@ class Database:
         self.user = user
         self.password = password
 
+    def _key(self):
+        return self.host, self.db_name, self.port, self.user, self.password
+
+    def __eq__(self, other):
+        return isinstance(other, Database) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
     def __repr__(self):
         return f"Database(host={self.host}, db_name={self.db_name}, port={self.port}, user={self.user})"
\ No newline at end of file
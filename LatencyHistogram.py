@@ -0,0 +1,76 @@
+class LatencyHistogram:
+    """
+    HDR-style latency histogram. Values are recorded in microseconds; below `2 ** sub_bucket_bits`
+    they are kept exactly, above that every power-of-two range is split into the same number of
+    linear sub-buckets, so the relative error stays under 10 ** -significant_digits.
+    """
+
+    PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+    def __init__(self, significant_digits=3):
+        self.significant_digits = significant_digits
+        self.sub_bucket_bits = (2 * 10 ** significant_digits - 1).bit_length()
+        self.counts = {}
+        self.total_count = 0
+        self.total_sum = 0.0
+        self.min_value = None
+        self.max_value = None
+
+    def _bucket(self, value):
+        shift = value.bit_length() - self.sub_bucket_bits
+        if shift <= 0:
+            return value, 0
+        return (value >> shift) << shift, shift
+
+    def record(self, seconds):
+        value = max(0, int(round(seconds * 1_000_000)))
+        lower, _ = self._bucket(value)
+        self.counts[lower] = self.counts.get(lower, 0) + 1
+        self.total_count += 1
+        self.total_sum += seconds
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = value if self.max_value is None else max(self.max_value, value)
+
+    def merge(self, other):
+        for lower, count in other.counts.items():
+            self.counts[lower] = self.counts.get(lower, 0) + count
+        self.total_count += other.total_count
+        self.total_sum += other.total_sum
+        for value in (other.min_value, other.max_value):
+            if value is None:
+                continue
+            self.min_value = value if self.min_value is None else min(self.min_value, value)
+            self.max_value = value if self.max_value is None else max(self.max_value, value)
+        return self
+
+    @property
+    def mean(self):
+        if not self.total_count:
+            return 0.0
+        return self.total_sum / self.total_count
+
+    @property
+    def max(self):
+        return (self.max_value or 0) / 1_000_000
+
+    def percentile(self, percentile):
+        """Highest value (in seconds) equivalent to the given percentile, capped at the recorded max."""
+        if not self.total_count:
+            return 0.0
+        target = max(1, -(-self.total_count * percentile // 100))
+        seen = 0
+        for lower in sorted(self.counts):
+            seen += self.counts[lower]
+            if seen >= target:
+                _, shift = self._bucket(lower)
+                highest = lower + (1 << shift) - 1
+                return min(highest, self.max_value) / 1_000_000
+        return self.max
+
+    def summary(self):
+        values = {f"p{p:g}": self.percentile(p) for p in self.PERCENTILES}
+        values["max"] = self.max
+        return values
+
+    def __repr__(self):
+        return f"LatencyHistogram(count={self.total_count}, mean={self.mean}, max={self.max})"
@@ -0,0 +1,42 @@
+import importlib
+import sys
+import time
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access, so database drivers and
+    matplotlib cost nothing unless a run uses them. `LazyModule("psycopg2", "extras")` also imports
+    `psycopg2.extras`. The time spent in each import is kept in `LazyModule.import_times`.
+    """
+
+    import_times = {}
+
+    def __init__(self, name, *submodules):
+        self._name = name
+        self._submodules = submodules
+        self._module = None
+
+    @classmethod
+    def load(cls, name):
+        """Import `name` (if it is not imported yet) and record how long that took."""
+        if name in sys.modules:
+            return sys.modules[name]
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        cls.import_times[name] = time.perf_counter() - start
+        return module
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = self.load(self._name)
+            for submodule in self._submodules:
+                self.load(f"{self._name}.{submodule}")
+        value = getattr(self._module, attribute)
+        # later lookups find the attribute directly and skip __getattr__
+        setattr(self, attribute, value)
+        return value
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"LazyModule({self._name}, {state})"
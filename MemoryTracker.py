@@ -0,0 +1,63 @@
+import sys
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+
+class MemoryTracker:
+    """
+    Peak resident memory of this process during a run, in bytes. On Linux the kernel's high-water
+    mark (VmHWM) is reset by `start()`, so the peak covers only the run, driver buffers included.
+    Elsewhere the peak since process start (getrusage) is the best available figure, and on Windows
+    none is reported. The numbers are per process: runs executing concurrently in one process share
+    them.
+    """
+
+    STATUS_FILE = "/proc/self/status"
+    CLEAR_REFS_FILE = "/proc/self/clear_refs"
+
+    def __init__(self):
+        self.baseline = None
+        self.peak = None
+        self.reset_peak = False
+
+    @classmethod
+    def _status_bytes(cls, field):
+        try:
+            with open(cls.STATUS_FILE, "r") as file:
+                for line in file:
+                    if line.startswith(field + ":"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return None
+
+    @staticmethod
+    def _max_rss_bytes():
+        if resource is None:
+            return None
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+    def start(self):
+        self.baseline = self._status_bytes("VmRSS")
+        try:
+            with open(self.CLEAR_REFS_FILE, "w") as file:
+                file.write("5")
+            self.reset_peak = True
+        except OSError:
+            self.reset_peak = False
+        return self
+
+    def stop(self):
+        """Return the peak resident memory in bytes since `start()`, or None when it is unknown."""
+        peak = self._status_bytes("VmHWM") if self.reset_peak else None
+        self.peak = peak if peak is not None else self._max_rss_bytes()
+        return self.peak
+
+    def __repr__(self):
+        return f"MemoryTracker(baseline={self.baseline}, peak={self.peak})"
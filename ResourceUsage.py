@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+import tracemalloc
+
+from MemoryTracker import MemoryTracker
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+RESOURCE_COLUMNS = ["cpu_user", "cpu_sys", "cpu_scope", "rss_delta", "alloc_peak", "alloc_blocks"]
+
+
+class ResourceUsage:
+    """
+    Client-side cost of a timed region: CPU time (user and system), how far the peak resident memory
+    rose above the resident memory at the start, and with `trace_allocations` the tracemalloc peak in
+    bytes and the net number of allocated blocks.
+
+    CPU time is that of the whole process (`cpu_scope` "process"), so it includes driver threads
+    such as Cassandra's event loop, which decodes responses and runs the completion callbacks. When
+    another run in the process overlapped, the process figures include its work, and the CPU time
+    summed over the threads that called `thread_started()`/`thread_finished()` is recorded instead
+    (`cpu_scope` "threads"). Memory can only be had for the whole process: like MemoryTracker,
+    rss_delta includes overlapping runs, and the allocation figures are left out (None) for them.
+    Tracing allocations slows Python down noticeably, so it is off by default.
+    """
+
+    # process-wide figures are only this run's when no other run was active meanwhile
+    runs_lock = threading.Lock()
+    active_runs = 0
+    run_starts = 0
+    # tracemalloc is process-wide: it runs while any traced run is active
+    tracing_runs = 0
+    started_tracing = False
+
+    def __init__(self, trace_allocations=False):
+        self.trace_allocations = trace_allocations
+        self.memory = MemoryTracker()
+        self.lock = threading.Lock()
+        self.blocks = None
+        self.run_index = None
+        self.shared = False
+        self.process_cpu = None
+        self.thread_user = None
+        self.thread_sys = None
+        self.cpu_user = None
+        self.cpu_sys = None
+        self.cpu_scope = None
+        self.rss_delta = None
+        self.alloc_peak = None
+        self.alloc_blocks = None
+
+    @staticmethod
+    def process_cpu_time():
+        """`(user, system)` CPU seconds of the whole process."""
+        if resource is not None:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            return usage.ru_utime, usage.ru_stime
+        return os.times()[:2]
+
+    @staticmethod
+    def thread_cpu():
+        """`(user, system)` CPU seconds of the calling thread; system is None where only the total is known."""
+        if resource is not None and hasattr(resource, "RUSAGE_THREAD"):
+            usage = resource.getrusage(resource.RUSAGE_THREAD)
+            return usage.ru_utime, usage.ru_stime
+        return time.thread_time(), None
+
+    def thread_started(self):
+        """Call on every thread doing the run's work; pass the result to `thread_finished()` on the same thread."""
+        return self.thread_cpu()
+
+    def thread_finished(self, started):
+        user, system = self.thread_cpu()
+        with self.lock:
+            self.thread_user = (self.thread_user or 0.0) + user - started[0]
+            if system is not None:
+                self.thread_sys = (self.thread_sys or 0.0) + system - started[1]
+
+    @staticmethod
+    def _traced_blocks():
+        return sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+
+    def start(self):
+        cls = ResourceUsage
+        with cls.runs_lock:
+            self.shared = cls.active_runs > 0
+            cls.active_runs += 1
+            cls.run_starts += 1
+            self.run_index = cls.run_starts
+            if self.trace_allocations:
+                if cls.tracing_runs == 0:
+                    cls.started_tracing = not tracemalloc.is_tracing()
+                    if cls.started_tracing:
+                        tracemalloc.start()
+                if not self.shared:
+                    tracemalloc.reset_peak()
+                cls.tracing_runs += 1
+                self.blocks = self._traced_blocks()
+        self.memory.start()
+        self.process_cpu = self.process_cpu_time()
+        return self
+
+    def stop(self):
+        user, system = self.process_cpu_time()
+        peak = self.memory.stop()
+        if peak is not None and self.memory.baseline is not None:
+            self.rss_delta = peak - self.memory.baseline
+        cls = ResourceUsage
+        with cls.runs_lock:
+            # another run started before this one ended, or was still running when it started
+            overlapped = self.shared or cls.run_starts != self.run_index
+            cls.active_runs -= 1
+            if self.trace_allocations:
+                if not overlapped:
+                    self.alloc_peak = tracemalloc.get_traced_memory()[1]
+                    self.alloc_blocks = self._traced_blocks() - self.blocks
+                cls.tracing_runs -= 1
+                if cls.tracing_runs == 0 and cls.started_tracing:
+                    tracemalloc.stop()
+                    cls.started_tracing = False
+        if overlapped:
+            self.cpu_user, self.cpu_sys, self.cpu_scope = self.thread_user, self.thread_sys, "threads"
+        else:
+            self.cpu_user = user - self.process_cpu[0]
+            self.cpu_sys = system - self.process_cpu[1]
+            self.cpu_scope = "process"
+        return self
+
+    @property
+    def peak_memory(self):
+        return self.memory.peak
+
+    def summary(self):
+        """The RESOURCE_COLUMNS values; None for what was not measured."""
+        return {column: getattr(self, column) for column in RESOURCE_COLUMNS}
+
+    def __repr__(self):
+        return f"ResourceUsage({', '.join(f'{name}={value}' for name, value in self.summary().items())})"
@@ -0,0 +1,131 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from ResourceUsage import RESOURCE_COLUMNS
+
+# result columns holding the mean of a timing phase
+PHASE_COLUMNS = {"build_time": "build", "encode_time": "encode", "pool_time": "pool", "send_time": "send",
+                 "execute_time": "execute", "server_time": "server", "fetch_time": "fetch", "client_time": "client"}
+RESULT_COLUMNS = ["records", "avg", "concurrency", "throughput", "p50", "p90", "p99", "p99.9", "max",
+                  "time_to_first_row", "time_to_last_row", "connect_time", "chunk_rows", "commit_time",
+                  "peak_memory", "errors"] + RESOURCE_COLUMNS + list(PHASE_COLUMNS)
+METADATA_COLUMNS = ["recorded_at", "test_name", "label", "iterations", "host", "options", "server_stats"]
+
+
+class ResultStore:
+    """
+    Append-only SQLite store of benchmark results, one row per run with its metadata (time, iterations,
+    concurrency, client host, options). Recording a result is a single INSERT; plots read series back
+    with `series()` when they are rendered. The database is created on the first append.
+    """
+
+    def __init__(self, path="./results/results.db"):
+        self.path = path
+        self.connection = None
+        self.lock = threading.Lock()
+        # appends through this store, so readers notice them even within the file's mtime resolution
+        self.appended = 0
+
+    def _connect(self):
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS results (id INTEGER PRIMARY KEY AUTOINCREMENT)")
+            known = {row[1] for row in self.connection.execute("PRAGMA table_info(results)")}
+            for column in METADATA_COLUMNS + RESULT_COLUMNS:
+                if column not in known:
+                    self.connection.execute(f'ALTER TABLE results ADD COLUMN "{column}"')
+            self.connection.commit()
+        return self.connection
+
+    @staticmethod
+    def _values(result):
+        percentiles = result.percentiles()
+        values = {
+            "avg": result.avg_execution_time,
+            "concurrency": result.concurrency,
+            "throughput": result.throughput,
+            "time_to_first_row": result.phase_mean("time_to_first_row"),
+            "time_to_last_row": result.phase_mean("time_to_last_row"),
+            "connect_time": result.connect_time,
+            "chunk_rows": result.chunk_rows,
+            "commit_time": result.phase_mean("commit"),
+            "peak_memory": result.peak_memory,
+            "errors": result.errors,
+        }
+        values.update(percentiles)
+        values.update({column: result.resources.get(column) for column in RESOURCE_COLUMNS})
+        values.update({column: result.phase_mean(phase) for column, phase in PHASE_COLUMNS.items()})
+        return values
+
+    def append(self, label, test_name, records, result, options=None):
+        values = self._values(result)
+        values.update({
+            "recorded_at": time.time(),
+            "test_name": test_name,
+            "label": label,
+            "records": records,
+            "iterations": result.iterations,
+            "host": socket.gethostname(),
+            "options": repr(options) if options is not None else None,
+            "server_stats": json.dumps(result.server_stats, default=str) if result.server_stats is not None else None,
+        })
+        columns = ", ".join(f'"{column}"' for column in values)
+        placeholders = ", ".join("?" for _ in values)
+        with self.lock:
+            connection = self._connect()
+            connection.execute(f"INSERT INTO results ({columns}) VALUES ({placeholders})", list(values.values()))
+            connection.commit()
+            self.appended += 1
+
+    def version(self):
+        """Changes whenever results are added, by this process or another one; None before the first result."""
+        if not os.path.exists(self.path):
+            return None
+        return os.stat(self.path).st_mtime_ns, self.appended
+
+    def series(self, test_name, column):
+        """`{label: [(records, value), ...]}` for one result column, sorted by the number of records."""
+        if column not in RESULT_COLUMNS:
+            raise ValueError(f"Unknown result column: {column}")
+        if not os.path.exists(self.path):
+            return {}
+        with self.lock:
+            rows = self._connect().execute(
+                f'SELECT label, records, "{column}" FROM results WHERE test_name = ? AND "{column}" IS NOT NULL '
+                f'ORDER BY label, records, id', (test_name,)).fetchall()
+        series = {}
+        for label, records, value in rows:
+            series.setdefault(label, []).append((records, value))
+        return series
+
+    def rows_after(self, test_name, column, after_id=0):
+        """`(id, label, records, value)` rows of one result column added after row `after_id`, in insertion order."""
+        if column not in RESULT_COLUMNS:
+            raise ValueError(f"Unknown result column: {column}")
+        if not os.path.exists(self.path):
+            return []
+        with self.lock:
+            return self._connect().execute(
+                f'SELECT id, label, records, "{column}" FROM results '
+                f'WHERE id > ? AND test_name = ? AND "{column}" IS NOT NULL ORDER BY id',
+                (after_id, test_name)).fetchall()
+
+    def test_names(self):
+        if not os.path.exists(self.path):
+            return []
+        with self.lock:
+            return [row[0] for row in self._connect().execute("SELECT DISTINCT test_name FROM results ORDER BY test_name")]
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def __repr__(self):
+        return f"ResultStore(path={self.path})"
@@ -0,0 +1,36 @@
+import threading
+
+
+class BenchmarkCancelled(Exception):
+    """Raised by a run whose RunMonitor was cancelled; no result is saved for it."""
+
+
+class RunMonitor:
+    """
+    Hooks for watching a benchmark from another thread (e.g. the GUI): `on_iteration(completed,
+    latency)` is called after every timed iteration, and `cancel()` stops the run before its next
+    iteration. A query that is already executing is not interrupted.
+    """
+
+    def __init__(self, on_iteration=None):
+        self.on_iteration = on_iteration
+        self.cancel_event = threading.Event()
+        self.completed = 0
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def iteration_done(self, latency):
+        with self.lock:
+            self.completed += 1
+            completed = self.completed
+        if self.on_iteration:
+            self.on_iteration(completed, latency)
+
+    def __repr__(self):
+        return f"RunMonitor(completed={self.completed}, cancelled={self.cancelled})"
@@ -0,0 +1,39 @@
+import bisect
+
+
+class SeriesCache:
+    """
+    In-memory copy of one result column of a ResultStore, per test and label, kept sorted by the
+    number of records. A refresh costs nothing while the store is unchanged and otherwise reads only
+    the rows added since the previous refresh.
+    """
+
+    def __init__(self, store, column="avg"):
+        self.store = store
+        self.column = column
+        self.series = {}
+        self.last_ids = {}
+        self.versions = {}
+
+    def refresh(self, test_name):
+        """Bring the series of a test up to date and return the labels that got new points."""
+        version = self.store.version()
+        if version is None or self.versions.get(test_name) == version:
+            return set()
+        self.versions[test_name] = version
+
+        series = self.series.setdefault(test_name, {})
+        changed = set()
+        for row_id, label, records, value in self.store.rows_after(test_name, self.column,
+                                                                    self.last_ids.get(test_name, 0)):
+            bisect.insort(series.setdefault(label, []), (records, value), key=lambda pair: pair[0])
+            changed.add(label)
+            self.last_ids[test_name] = row_id
+        return changed
+
+    def get(self, test_name):
+        """`{label: [(records, value), ...]}` as of the last refresh."""
+        return self.series.get(test_name, {})
+
+    def __repr__(self):
+        return f"SeriesCache(column={self.column}, tests={list(self.series)})"
@@ -0,0 +1,256 @@
+import json
+import re
+
+# statements ANALYZE can run; others are executed as they are, so later statements see their effect
+EXPLAINABLE = {
+    "PostgreSQL": ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"),
+    "MariaDB": ("SELECT", "UPDATE", "DELETE"),
+}
+EXPLAIN_PREFIX = {
+    "PostgreSQL": "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ",
+    "MariaDB": "ANALYZE FORMAT=JSON ",
+}
+STATEMENT_COUNTERS = {
+    # needs the pg_stat_statements extension (shared_preload_libraries and CREATE EXTENSION)
+    "PostgreSQL": "SELECT queryid, query, calls, total_exec_time AS time_ms, rows, shared_blks_hit, shared_blks_read, "
+                  "temp_blks_written FROM pg_stat_statements "
+                  "WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())",
+    # empty unless performance_schema is enabled on the server
+    "MariaDB": "SELECT DIGEST, DIGEST_TEXT, COUNT_STAR AS calls, SUM_TIMER_WAIT / 1000000000 AS time_ms, "
+               "SUM_ROWS_EXAMINED AS rows_examined, SUM_ROWS_SENT AS rows_sent, SUM_ROWS_AFFECTED AS rows_affected, "
+               "SUM_NO_INDEX_USED AS no_index_used "
+               "FROM performance_schema.events_statements_summary_by_digest WHERE SCHEMA_NAME = DATABASE()",
+}
+# Mongo operations the explain command accepts, as the command document of one call
+MONGO_COMMANDS = {
+    "find": lambda collection, params, limit: dict(
+        {"find": collection, "filter": params[0] if params else {}},
+        **({"projection": params[1]} if len(params) > 1 else {}), **({"limit": limit} if limit else {})),
+    "aggregate": lambda collection, params, limit: {"aggregate": collection, "pipeline": params[0], "cursor": {}},
+    "update_many": lambda collection, params, limit: {
+        "update": collection, "updates": [{"q": params[0], "u": params[1], "multi": True}]},
+    "update_one": lambda collection, params, limit: {
+        "update": collection, "updates": [{"q": params[0], "u": params[1]}]},
+    "delete_many": lambda collection, params, limit: {
+        "delete": collection, "deletes": [{"q": params[0], "limit": 0}]},
+    "delete_one": lambda collection, params, limit: {
+        "delete": collection, "deletes": [{"q": params[0], "limit": 1}]},
+}
+TOP_STATEMENTS = 10
+# the chunks of a literal split write only differ after this keyword
+LITERAL_VALUES = re.compile(r"\b(?:VALUES|SET|WHERE)\b", re.IGNORECASE)
+LITERAL_WRITES = ("INSERT", "UPDATE", "DELETE", "BEGIN BATCH")
+
+
+class ServerStats:
+    """
+    What the server did for a test, collected outside the timed run on a connection of its own:
+    - PostgreSQL: EXPLAIN (ANALYZE, BUFFERS) of every statement and pg_stat_statements deltas over the run;
+    - MariaDB: ANALYZE FORMAT=JSON of every statement and performance_schema digest deltas over the run;
+    - MongoDB: explain with executionStats verbosity (write operations are not applied);
+    - Cassandra: a traced execution of every statement.
+    The chunks of a split write are all alike, so only the first one is explained or traced, and the
+    number of chunks is recorded with it; every distinct statement gets a plan of its own.
+    SQL statements are explained in a transaction that is rolled back, but ANALYZE does execute them,
+    so statements with side effects outside the transaction (sequences, autocommitted DDL) leave them.
+    A failing part is recorded as an error in `stats` instead of failing the test.
+    """
+
+    def __init__(self, db_type):
+        self.db_type = db_type
+        self.counters = None
+        self.stats = {}
+
+    @staticmethod
+    def _rows(cursor):
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def _statement_counters(self, connection):
+        cursor = connection.cursor()
+        try:
+            cursor.execute(STATEMENT_COUNTERS[self.db_type])
+            # first column identifies the statement, the second is its text, the rest are counters
+            return {tuple(row.values())[0]: row for row in self._rows(cursor)}
+        finally:
+            cursor.close()
+            connection.rollback()
+
+    def snapshot(self, connection):
+        """Take the statement counters before the timed run (SQL databases)."""
+        try:
+            self.counters = self._statement_counters(connection)
+        except Exception as e:
+            self.counters = None
+            self.stats["statements"] = {"error": str(e)}
+
+    def _statement_deltas(self, connection):
+        after = self._statement_counters(connection)
+        deltas = []
+        for key, row in after.items():
+            before = self.counters.get(key, {})
+            _, text_column, *counters = row
+            delta = {"query": row[text_column]}
+            delta.update({name: float(row[name] or 0) - float(before.get(name) or 0) for name in counters})
+            if delta["calls"] > 0:
+                deltas.append(delta)
+        deltas.sort(key=lambda delta: delta["time_ms"], reverse=True)
+        return deltas[:TOP_STATEMENTS]
+
+    @staticmethod
+    def _arguments(statement, params):
+        return (statement,) if params is None else (statement, params)
+
+    def _analyze(self, cursor, statement, params=None):
+        if not statement.lstrip().upper().startswith(EXPLAINABLE[self.db_type]):
+            cursor.execute(*self._arguments(statement, params))
+            return None
+        cursor.execute(*self._arguments(EXPLAIN_PREFIX[self.db_type] + statement, params))
+        plan = cursor.fetchone()[0]
+        # psycopg2 decodes json results, MariaDB returns text
+        return json.loads(plan) if isinstance(plan, str) else plan
+
+    @staticmethod
+    def _literal_prefix(statement):
+        """The text a literal write statement shares with the other chunks of its write, else None."""
+        if not statement.lstrip().upper().startswith(LITERAL_WRITES):
+            return None
+        return " ".join(LITERAL_VALUES.split(statement, maxsplit=1)[0].split())
+
+    @staticmethod
+    def _representatives(statements):
+        """
+        `(statement, params, chunks)` of the `(statement, params)` pairs, consecutive chunks of one
+        write counted into the first: parameterized chunks share their template, literal ones the
+        text before their values (see `_literal_prefix()`).
+        """
+        runs = []
+        for statement, params in statements:
+            if params is not None:
+                template = getattr(statement, "query_string", statement)
+            else:
+                template = ServerStats._literal_prefix(statement)
+            if runs and template is not None and runs[-1][3] == (params is None, template):
+                runs[-1][2] += 1
+            else:
+                runs.append([statement, params, 1, (params is None, template)])
+        return [(statement, params, count) for statement, params, count, _ in runs]
+
+    def collect_sql(self, connection, statements):
+        """
+        Statement counter deltas since `snapshot()`, then a plan of every `(sql, params)` statement. A
+        statement with a parameter stream is explained with its first row only.
+        """
+        if self.counters is not None:
+            try:
+                self.stats["statements"] = self._statement_deltas(connection)
+            except Exception as e:
+                self.stats["statements"] = {"error": str(e)}
+        plans = []
+        cursor = connection.cursor()
+        try:
+            for sql, params, count in self._representatives(statements):
+                if sql.lstrip().upper().startswith("COPY"):
+                    plans.append({"query": sql, "error": "COPY cannot be explained"})
+                    continue
+                rows = None if params is None else len(params)
+                first_row = params[0] if params else None
+                if params and self.db_type == "PostgreSQL" and "VALUES %s" in sql:
+                    # an execute_values template takes whole rows, also when there is only one
+                    first_row = (first_row,)
+                try:
+                    plan = self._analyze(cursor, sql, first_row)
+                except Exception as e:
+                    # the transaction is aborted, and the statements after this one may depend on it
+                    plans.append({"query": sql, "error": str(e)})
+                    break
+                if plan is not None:
+                    entry = {"query": sql, "plan": plan}
+                    if rows and rows > 1:
+                        entry["rows"] = rows
+                    if count > 1:
+                        entry["chunks"] = count
+                    plans.append(entry)
+        finally:
+            cursor.close()
+            connection.rollback()
+        self.stats["plans"] = plans
+        return self.stats
+
+    def collect_mongo(self, database, queries):
+        """executionStats explain of every `(collection, operation, params, limit)` query."""
+        plans = []
+        for collection, operation, params, limit in queries:
+            if operation not in MONGO_COMMANDS:
+                # chunked inserts are all alike
+                plans.append({"operation": operation, "error": f"{operation} cannot be explained"})
+                break
+            try:
+                explained = database.command("explain", MONGO_COMMANDS[operation](collection, params, limit),
+                                             verbosity="executionStats")
+            except Exception as e:
+                plans.append({"operation": operation, "error": str(e)})
+                continue
+            plans.append({"operation": operation,
+                          "winningPlan": explained.get("queryPlanner", {}).get("winningPlan"),
+                          "executionStats": explained.get("executionStats"),
+                          # aggregations with $lookup report per stage
+                          "stages": explained.get("stages")})
+        self.stats["plans"] = plans
+        return self.stats
+
+    def collect_cassandra(self, session, statements):
+        """
+        Execute every `(statement, params)` pair once with tracing on; a parameter stream is traced
+        with its first row only.
+        """
+        traces = []
+        for statement, params, count in self._representatives(statements):
+            query = getattr(statement, "query_string", statement)
+            try:
+                result = session.execute(statement, params[0] if params else None, trace=True)
+                trace = result.get_query_trace()
+            except Exception as e:
+                traces.append({"query": query, "error": str(e)})
+                continue
+            traces.append({
+                "query": query,
+                "rows": len(params) if params else None,
+                "chunks": count,
+                "coordinator": str(trace.coordinator),
+                "duration_us": trace.duration.total_seconds() * 1e6 if trace.duration else None,
+                "events": [{"source": str(event.source),
+                            "elapsed_us": event.source_elapsed.total_seconds() * 1e6 if event.source_elapsed else None,
+                            "description": event.description} for event in trace.events],
+            })
+        self.stats["traces"] = traces
+        return self.stats
+
+    def summary(self):
+        """A few headline figures for the console; the full statistics are stored with the result."""
+        summary = {}
+        for plan in self.stats.get("plans", []):
+            if "error" in plan:
+                summary.setdefault("errors", 0)
+                summary["errors"] += 1
+                continue
+            if self.db_type == "PostgreSQL":
+                top = plan["plan"][0]
+                summary["execution_ms"] = summary.get("execution_ms", 0) + top.get("Execution Time", 0)
+                summary["shared_hit"] = summary.get("shared_hit", 0) + top["Plan"].get("Shared Hit Blocks", 0)
+                summary["shared_read"] = summary.get("shared_read", 0) + top["Plan"].get("Shared Read Blocks", 0)
+            elif self.db_type == "MariaDB":
+                summary["execution_ms"] = summary.get("execution_ms", 0) + \
+                    plan["plan"].get("query_block", {}).get("r_total_time_ms", 0)
+            elif self.db_type == "MongoDB":
+                execution = plan.get("executionStats") or {}
+                summary["docs_examined"] = summary.get("docs_examined", 0) + execution.get("totalDocsExamined", 0)
+                summary["keys_examined"] = summary.get("keys_examined", 0) + execution.get("totalKeysExamined", 0)
+                summary["returned"] = summary.get("returned", 0) + execution.get("nReturned", 0)
+        for trace in self.stats.get("traces", []):
+            if trace.get("duration_us") is not None:
+                summary["traced_us"] = summary.get("traced_us", 0) + trace["duration_us"]
+        return summary
+
+    def __repr__(self):
+        return f"ServerStats(db_type={self.db_type}, collected={sorted(self.stats)})"
@@ -0,0 +1,71 @@
+from functools import cached_property
+
+from datetime_script import generate_datetime, generate_timestamp
+
+
+class Workload:
+    """
+    Backend-neutral rows of a benchmark workload with `records_number` records, column by column:
+    the users, orders and order lines that every backend writes. Columns are built on first use and
+    kept, so the SQL, CQL and Mongo renderings in DataProvider share one copy of the data.
+    """
+
+    def __init__(self, records_number):
+        self.records_number = records_number
+        self.index = range(1, records_number + 1)
+        # add_to_cart_order values of the lines of every order
+        self.positions = range(1, min(3, records_number + 1))
+
+    @cached_property
+    def user_ids(self):
+        return [300000 + i for i in self.index]
+
+    @cached_property
+    def user_names(self):
+        return [f"User{user_id}" for user_id in self.user_ids]
+
+    @cached_property
+    def order_ids(self):
+        return [5000000 + i for i in self.index]
+
+    @cached_property
+    def order_dows(self):
+        return [i % 7 for i in self.index]
+
+    @cached_property
+    def days_since_prior(self):
+        return [i % 30 for i in self.index]
+
+    @cached_property
+    def reordered(self):
+        return [i % 2 for i in self.index]
+
+    @cached_property
+    def datetimes(self):
+        return [generate_datetime(i % 24, i % 30) for i in self.index]
+
+    @cached_property
+    def timestamps(self):
+        return [generate_timestamp(i % 24, i % 30) for i in self.index]
+
+    def orders(self, timestamps=False):
+        """Order rows: (order_id, user_id, order_number, order_dow, order_timestamp, days_since_prior_order)."""
+        return list(zip(self.order_ids, self.user_ids, self.index, self.order_dows,
+                        self.timestamps if timestamps else self.datetimes, self.days_since_prior))
+
+    @cached_property
+    def line_rows(self):
+        """Row number (0-based) of the order each order line belongs to, `len(positions)` lines per order."""
+        return [row for row in range(self.records_number) for _ in self.positions]
+
+    @cached_property
+    def line_positions(self):
+        return list(self.positions) * self.records_number
+
+    def order_products(self):
+        """Order line rows: (order_id, product_id, add_to_cart_order, reordered)."""
+        return [(self.order_ids[row], 50000 + row + 1, position, self.reordered[row])
+                for row, position in zip(self.line_rows, self.line_positions)]
+
+    def __repr__(self):
+        return f"Workload(records_number={self.records_number})"
@@ -0,0 +1,64 @@
+class WriteChunker:
+    """
+    Split large writes into chunks of at most `rows` rows and `max_bytes` bytes, so single
+    statements stay below the server limits. Defaults are per backend and derived from the server
+    defaults; `largest` keeps the biggest chunk (in rows) handed out, to be recorded with the result,
+    and `splits` counts the writes that did not fit in one chunk.
+    """
+
+    LIMITS = {
+        # no packet limit below 1 GB, but huge statements cost parse time and memory on both sides
+        "postgres": (50000, 16 * 1024 * 1024),
+        # max_allowed_packet defaults to 16 MB
+        "mariadb": (10000, 4 * 1024 * 1024),
+        # batch_size_fail_threshold_in_kb defaults to 50 KB
+        "cassandra": (1000, 40 * 1024),
+        # maxWriteBatchSize is 100000 documents, maxMessageSizeBytes 48 MB
+        "mongo": (100000, 32 * 1024 * 1024),
+    }
+
+    def __init__(self, db_type, rows=None, max_bytes=None):
+        if db_type not in self.LIMITS:
+            raise ValueError(f"Unknown database type: {db_type}")
+        default_rows, default_bytes = self.LIMITS[db_type]
+        self.db_type = db_type
+        self.rows = rows or default_rows
+        self.max_bytes = max_bytes or default_bytes
+        self.largest = 0
+        self.splits = 0
+
+    def split(self, items, size=len):
+        """
+        Cut `items` into consecutive lists within the row and byte limits; `size(item)` gives the
+        size of one item in bytes. An item larger than `max_bytes` still gets a chunk of its own.
+        """
+        chunks = []
+        chunk = []
+        chunk_bytes = 0
+        for item in items:
+            item_bytes = size(item)
+            if chunk and (len(chunk) >= self.rows or chunk_bytes + item_bytes > self.max_bytes):
+                chunks.append(chunk)
+                chunk = []
+                chunk_bytes = 0
+            chunk.append(item)
+            chunk_bytes += item_bytes
+        if chunk:
+            chunks.append(chunk)
+        self.largest = max([self.largest] + [len(chunk) for chunk in chunks])
+        if len(chunks) > 1:
+            self.splits += 1
+        return chunks
+
+    def split_statements(self, statements):
+        """Split the parameter streams of `(template, params)` statements into several statements."""
+        chunked = []
+        for template, params in statements:
+            if isinstance(params, str) or len(params) <= 1:
+                chunked.append((template, params))
+                continue
+            chunked.extend((template, chunk) for chunk in self.split(params, size=lambda row: len(str(row))))
+        return chunked
+
+    def __repr__(self):
+        return f"WriteChunker(db_type={self.db_type}, rows={self.rows}, max_bytes={self.max_bytes})"
@@ -1,15 +1,21 @@
 import csv
+import itertools
 import os
-from datetime import datetime
+import time
+
+import numpy as np
 
 from cassandra.cluster import Cluster
-from cassandra.query import BatchStatement
+from cassandra.concurrent import execute_concurrent
+from cassandra.query import BatchStatement, BatchType
 from cassandra import ConsistencyLevel
 import argparse
 from tqdm import tqdm
 import sys
 
-from datetime_script import generate_timestamp
+from datetime_script import generate_epoch_millis
+from OrderTable import OrderTable
+from csv_ingest import iter_chunks, parse_int_csv, parse_numeric_columns
 
 
 def create_keyspace_and_tables(session, keyspace_name="instacart", replication_factor=1):
@@ -92,7 +98,54 @@ def create_keyspace_and_tables(session, keyspace_name="instacart", replication_f
     print("Keyspace and tables created successfully")
 
 
-def load_products(session, data_dir):
+def group_by_partition(rows, batch_rows):
+    """
+    Turn `(table, prepared_stmt, partition_key, params)` rows into statements. Consecutive rows of the
+    same partition go into one UNLOGGED batch of at most `batch_rows` rows, everything else is sent as
+    a single prepared statement so the driver can route it straight to a replica.
+    """
+    for (table, prepared_stmt, _), group in itertools.groupby(rows, key=lambda row: row[:3]):
+        for chunk in iter(lambda: list(itertools.islice(group, batch_rows)), []):
+            if len(chunk) == 1:
+                yield table, 1, prepared_stmt, chunk[0][3]
+                continue
+            batch = BatchStatement(batch_type=BatchType.UNLOGGED, consistency_level=ConsistencyLevel.QUORUM)
+            for row in chunk:
+                batch.add(prepared_stmt, row[3])
+            yield table, len(chunk), batch, None
+
+
+def write_concurrently(session, rows, concurrency=64, batch_rows=100):
+    """
+    Execute `(table, prepared_stmt, partition_key, params)` rows with up to `concurrency` requests in
+    flight and report rows/s per table. Returns the number of rows written per table.
+    """
+    counts = {}
+
+    def statements():
+        for table, row_count, statement, params in group_by_partition(rows, batch_rows):
+            counts[table] = counts.get(table, 0) + row_count
+            yield statement, params
+
+    start = time.perf_counter()
+    results = execute_concurrent(session, statements(), concurrency=concurrency,
+                                 raise_on_first_error=True, results_generator=True)
+    for _ in results:
+        pass
+    elapsed = time.perf_counter() - start
+
+    for table, count in counts.items():
+        print(f"Loaded {count} rows into {table} in {elapsed:.1f}s ({count / max(elapsed, 1e-9):.0f} rows/s)")
+    return counts
+
+
+def prepare(session, query):
+    prepared_stmt = session.prepare(query)
+    prepared_stmt.consistency_level = ConsistencyLevel.QUORUM
+    return prepared_stmt
+
+
+def load_products(session, data_dir, concurrency=64, batch_rows=100):
     print("Loading products data...")
     products_file = os.path.join(data_dir, "products.csv")
 
@@ -104,37 +157,24 @@ def load_products(session, data_dir):
         INSERT INTO products (product_id, product_name, aisle_id, department_id)
         VALUES (?, ?, ?, ?)
     """
-    prepared_stmt = session.prepare(insert_query)
-
-    with open(products_file, 'r', encoding='utf-8') as file:
-        reader = csv.reader(file)
-        next(reader)
-
-        batch_size = 100
-        batch = BatchStatement(consistency_level=ConsistencyLevel.QUORUM)
-        batch_count = 0
-        total_count = 0
+    prepared_stmt = prepare(session, insert_query)
 
+    def rows(reader):
         for row in tqdm(reader, desc="Products"):
             product_id = int(row[0])
             product_name = row[1]
             aisle_id = int(row[2])
             department_id = int(row[3])
 
-            batch.add(prepared_stmt, (product_id, product_name, aisle_id, department_id))
-            batch_count += 1
+            yield "products", prepared_stmt, product_id, (product_id, product_name, aisle_id, department_id)
 
-            if batch_count >= batch_size:
-                session.execute(batch)
-                batch = BatchStatement(consistency_level=ConsistencyLevel.QUORUM)
-                batch_count = 0
-                total_count += batch_size
+    with open(products_file, 'r', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        next(reader)
 
-        if batch_count > 0:
-            session.execute(batch)
-            total_count += batch_count
+        counts = write_concurrently(session, rows(reader), concurrency, batch_rows)
 
-    print(f"Loaded {total_count} products")
+    print(f"Loaded {counts.get('products', 0)} products")
 
 
 def load_aisles(session, data_dir):
@@ -191,7 +231,7 @@ def load_departments(session, data_dir):
     print("Departments data loaded successfully")
 
 
-def load_orders(session, data_dir):
+def load_orders(session, data_dir, concurrency=64, batch_rows=100, order_table_path=None, workers=None):
     print("Loading orders data...")
     orders_file = os.path.join(data_dir, "orders.csv")
 
@@ -203,66 +243,38 @@ def load_orders(session, data_dir):
         INSERT INTO orders (order_id, user_id, order_number, order_dow, order_timestamp, days_since_prior_order)
         VALUES (?, ?, ?, ?, ?, ?)
     """
-    prepared_stmt = session.prepare(insert_query)
+    prepared_stmt = prepare(session, insert_query)
 
     insert_by_timestamp_query = """
         INSERT INTO orders_by_timestamp (order_id, order_timestamp, user_id, order_number)
         VALUES (?, ?, ?, ?)
     """
-    prepared_by_timestamp_stmt = session.prepare(insert_by_timestamp_query)
+    prepared_by_timestamp_stmt = prepare(session, insert_by_timestamp_query)
 
-    order_data = {}
+    order_table = OrderTable(path=order_table_path)
 
-    with open(orders_file, 'r', encoding='utf-8') as file:
-        reader = csv.reader(file)
-        next(reader)
+    def rows(chunks):
+        for chunk in chunks:
+            order_timestamps = generate_epoch_millis(chunk[:, 4], chunk[:, 5])
+            for (order_id, user_id, order_number, order_dow, _, days_since_prior_order), order_timestamp in zip(
+                    chunk.tolist(), order_timestamps.tolist()):
+                yield ("orders", prepared_stmt, order_id,
+                       (order_id, user_id, order_number, order_dow, order_timestamp, days_since_prior_order))
+                yield ("orders_by_timestamp", prepared_by_timestamp_stmt, order_id,
+                       (order_id, order_timestamp, user_id, order_number))
+
+            order_table.set_many(chunk[:, 0], user_id=chunk[:, 1], order_number=chunk[:, 2], order_dow=chunk[:, 3],
+                                 order_timestamp=order_timestamps, days_since_prior_order=chunk[:, 5])
+
+    chunks = iter_chunks(orders_file, parse_numeric_columns, [0, 1, 3, 4, 5, 6], workers=workers, desc="Orders")
+    counts = write_concurrently(session, rows(chunks), concurrency, batch_rows)
+    order_table.flush()
+
+    print(f"Loaded {counts.get('orders', 0)} orders")
+    return order_table
 
-        batch_size = 100
-        batch = BatchStatement(consistency_level=ConsistencyLevel.QUORUM)
-        batch_timestamp = BatchStatement(consistency_level=ConsistencyLevel.QUORUM)
-        batch_count = 0
-        total_count = 0
-
-        for row in tqdm(reader, desc="Orders"):
-            order_id = int(row[0])
-            user_id = int(row[1])
-            order_number = int(row[3])
-            order_dow = int(row[4])
-            order_timestamp = datetime.strptime(
-                generate_timestamp(hour=int(float(row[5])), days_offset=int(float(row[6] or 0))), "%Y-%m-%d %H:%M:%S")
-            days_since_prior_order = int(float(row[6])) if row[6] and row[6] != "" else 0
-            order_data[order_id] = {
-                'user_id': user_id,
-                'order_number': order_number,
-                'order_dow': order_dow,
-                'order_timestamp': order_timestamp,
-                'days_since_prior_order': days_since_prior_order
-            }
-
-            batch.add(prepared_stmt,
-                      (order_id, user_id, order_number, order_dow, order_timestamp, days_since_prior_order))
-            batch_timestamp.add(prepared_by_timestamp_stmt,
-                                (order_id, order_timestamp, user_id, order_number))
-            batch_count += 1
-
-            if batch_count >= batch_size:
-                session.execute(batch)
-                session.execute(batch_timestamp)
-                batch = BatchStatement(consistency_level=ConsistencyLevel.QUORUM)
-                batch_timestamp = BatchStatement(consistency_level=ConsistencyLevel.QUORUM)
-                batch_count = 0
-                total_count += batch_size
-
-        if batch_count > 0:
-            session.execute(batch)
-            session.execute(batch_timestamp)
-            total_count += batch_count
-
-    print(f"Loaded {total_count} orders")
-    return order_data
-
-
-def load_order_products_by_order(session, data_dir, order_data):
+
+def load_order_products_by_order(session, data_dir, order_table, concurrency=64, batch_rows=100, workers=None):
     print("Loading order products data into order_products_by_order...")
     order_products_file = os.path.join(data_dir, "orders_products.csv")
 
@@ -276,6 +288,10 @@ def load_order_products_by_order(session, data_dir, order_data):
         print("Error: No order products files found!")
         return
 
+    if order_table is None:
+        print("Error: No order data available, load orders or pass --order-table-path of a previous run!")
+        return
+
     product_names = {}
     print("Loading product names into memory...")
     query = "SELECT product_id, product_name FROM products"
@@ -292,7 +308,7 @@ def load_order_products_by_order(session, data_dir, order_data):
         )
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """
-    prepared_stmt = session.prepare(insert_query)
+    prepared_stmt = prepare(session, insert_query)
 
     total_count = 0
 
@@ -300,91 +316,71 @@ def load_order_products_by_order(session, data_dir, order_data):
         file_name = os.path.basename(file_path)
         print(f"Processing {file_name}...")
 
-        line_count = sum(1 for _ in open(file_path, 'r', encoding='utf-8')) - 1
-
-        with open(file_path, 'r', encoding='utf-8') as file:
-            reader = csv.reader(file)
-            next(reader)
-
-            batch_size = 100
-            batch = BatchStatement(consistency_level=ConsistencyLevel.QUORUM)
-            batch_count = 0
-            file_count = 0
-
-            for row in tqdm(reader, total=line_count, desc=file_name):
-                order_id = int(row[0])
-                product_id = int(row[1])
-                add_to_cart_order = int(row[2])
-                reordered = int(row[3])
-
-                order_info = order_data.get(order_id, {})
-                if not order_info:
-                    print(f"Warning: No order data found for order_id {order_id}")
-                    continue
-
-                product_name = product_names.get(product_id, "Unknown Product")
-
-                batch.add(prepared_stmt, (
-                    order_id,
-                    product_id,
-                    order_info.get('user_id'),
-                    order_info.get('order_number'),
-                    order_info.get('order_dow'),
-                    order_info.get('order_timestamp'),
-                    order_info.get('days_since_prior_order'),
-                    product_name,
-                    add_to_cart_order,
-                    reordered
-                ))
-                batch_count += 1
-
-                if batch_count >= batch_size:
-                    session.execute(batch)
-                    batch = BatchStatement(consistency_level=ConsistencyLevel.QUORUM)
-                    batch_count = 0
-                    file_count += batch_size
-
-            if batch_count > 0:
-                session.execute(batch)
-                file_count += batch_count
-
-            total_count += file_count
-            print(f"Loaded {file_count} records from {file_name}")
+        def rows(chunks):
+            for columns in chunks:
+                order_info = order_table.lookup(columns[:, 0])
+
+                missing = np.count_nonzero(~order_info["present"])
+                if missing:
+                    print(f"Warning: No order data found for {missing} order products rows")
+
+                found = order_info["present"]
+                chunk_rows = zip(
+                    columns[found, 0].tolist(),
+                    columns[found, 1].tolist(),
+                    order_info["user_id"][found].tolist(),
+                    order_info["order_number"][found].tolist(),
+                    order_info["order_dow"][found].tolist(),
+                    order_info["order_timestamp"][found].tolist(),
+                    order_info["days_since_prior_order"][found].tolist(),
+                    columns[found, 2].tolist(),
+                    columns[found, 3].tolist()
+                )
+                for (order_id, product_id, user_id, order_number, order_dow, order_timestamp,
+                     days_since_prior_order, add_to_cart_order, reordered) in chunk_rows:
+                    product_name = product_names.get(product_id, "Unknown Product")
+
+                    yield "order_products_by_order", prepared_stmt, order_id, (
+                        order_id,
+                        product_id,
+                        user_id,
+                        order_number,
+                        order_dow,
+                        order_timestamp,
+                        days_since_prior_order,
+                        product_name,
+                        add_to_cart_order,
+                        reordered
+                    )
+
+        chunks = iter_chunks(file_path, parse_int_csv, 4, workers=workers, desc=file_name)
+        counts = write_concurrently(session, rows(chunks), concurrency, batch_rows)
+        file_count = counts.get("order_products_by_order", 0)
+
+        total_count += file_count
+        print(f"Loaded {file_count} records from {file_name}")
 
     print(f"Loaded {total_count} order products records in total")
 
 
-def load_users(session):
+def load_users(session, concurrency=64, batch_rows=100):
     print("Loading users data...")
 
     insert_query = """
         INSERT INTO users (user_id, name)
         VALUES (?, ?)
     """
-    prepared_stmt = session.prepare(insert_query)
-
-    batch_size = 100
-    batch = BatchStatement(consistency_level=ConsistencyLevel.QUORUM)
-    batch_count = 0
-    total_count = 0
-
-    for user_id in tqdm(range(1, 206210), desc="Users"):
-        name = f"User{user_id}"
+    prepared_stmt = prepare(session, insert_query)
 
-        batch.add(prepared_stmt, (user_id, name))
-        batch_count += 1
+    def rows():
+        for user_id in tqdm(range(1, 206210), desc="Users"):
+            name = f"User{user_id}"
 
-        if batch_count >= batch_size:
-            session.execute(batch)
-            batch = BatchStatement(consistency_level=ConsistencyLevel.QUORUM)
-            batch_count = 0
-            total_count += batch_size
+            yield "users", prepared_stmt, user_id, (user_id, name)
 
-    if batch_count > 0:
-        session.execute(batch)
-        total_count += batch_count
+    counts = write_concurrently(session, rows(), concurrency, batch_rows)
 
-    print(f"Loaded {total_count} users")
+    print(f"Loaded {counts.get('users', 0)} users")
 
 
 def create_indexes(session):
@@ -417,6 +413,10 @@ def main():
     parser.add_argument("--skip-orders", action="store_true", help="Skip loading orders data")
     parser.add_argument("--skip-order-products", action="store_true", help="Skip loading order products data")
     parser.add_argument("--skip-users", action="store_true", help="Skip loading users data")
+    parser.add_argument("--concurrency", type=int, default=64, help="Number of requests kept in flight while loading")
+    parser.add_argument("--batch-rows", type=int, default=100, help="Maximum rows per single-partition unlogged batch")
+    parser.add_argument("--order-table-path", default=None, help="Directory for a memory-mapped order lookup table")
+    parser.add_argument("--workers", type=int, default=None, help="Number of CSV parsing processes (default: CPU count)")
 
     args = parser.parse_args()
 
@@ -441,17 +441,21 @@ def main():
             load_departments(session, args.data_dir)
 
         if not args.skip_products:
-            load_products(session, args.data_dir)
+            load_products(session, args.data_dir, args.concurrency, args.batch_rows)
 
-        order_data = {}
+        order_table = None
         if not args.skip_orders:
-            order_data = load_orders(session, args.data_dir)
+            order_table = load_orders(session, args.data_dir, args.concurrency, args.batch_rows,
+                                      args.order_table_path, args.workers)
+        elif args.order_table_path and os.path.exists(args.order_table_path):
+            order_table = OrderTable.open(args.order_table_path)
 
         if not args.skip_order_products:
-            load_order_products_by_order(session, args.data_dir, order_data)
+            load_order_products_by_order(session, args.data_dir, order_table, args.concurrency, args.batch_rows,
+                                         args.workers)
 
         if not args.skip_users:
-            load_users(session)
+            load_users(session, args.concurrency, args.batch_rows)
 
         if not args.skip_indexes:
             create_indexes(session)
@@ -0,0 +1,76 @@
+import csv
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from tqdm import tqdm
+
+DEFAULT_CHUNK_BYTES = 16 * 1024 * 1024
+
+
+def chunk_ranges(file_path, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Split a CSV file (without its header line) into `(start, end)` byte ranges of roughly
+    `chunk_bytes`, each ending on a line boundary.
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, "rb") as file:
+        file.readline()
+        start = file.tell()
+        while start < file_size:
+            file.seek(min(start + chunk_bytes, file_size))
+            file.readline()
+            end = min(file.tell(), file_size)
+            yield start, end
+            start = end
+
+
+def read_range(file_path, start, end):
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        return file.read(end - start).decode("utf-8")
+
+
+def parse_int_csv(file_path, start, end, column_count):
+    """Parse a byte range of an all-integer CSV into an int64 array of shape (rows, column_count)."""
+    text = read_range(file_path, start, end).replace("\r", "").strip().replace("\n", ",")
+    if not text:
+        return np.empty((0, column_count), dtype=np.int64)
+    return np.fromstring(text, dtype=np.int64, sep=",").reshape(-1, column_count)
+
+
+def parse_numeric_columns(file_path, start, end, columns):
+    """
+    Parse the given columns of a byte range of a mixed CSV into an int64 array. Values may be
+    written as floats ("15.0"), empty values become 0.
+    """
+    rows = csv.reader(read_range(file_path, start, end).splitlines())
+    picked = [[row[column] or "0" for column in columns] for row in rows if row]
+    if not picked:
+        return np.empty((0, len(columns)), dtype=np.int64)
+    return np.array(picked, dtype=np.float64).astype(np.int64)
+
+
+def iter_chunks(file_path, parse, *args, workers=None, chunk_bytes=DEFAULT_CHUNK_BYTES, desc=None):
+    """
+    Parse `file_path` chunk by chunk in a process pool and yield the parsed chunks in file order.
+    `parse(file_path, start, end, *args)` must be a module-level function. At most two chunks per
+    worker are parsed ahead of the consumer, and progress is reported in bytes.
+    """
+    workers = workers or os.cpu_count() or 1
+    progress = tqdm(total=os.path.getsize(file_path), unit="B", unit_scale=True,
+                    desc=desc or os.path.basename(file_path))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start, end in chunk_ranges(file_path, chunk_bytes):
+            pending.append((end - start, executor.submit(parse, file_path, start, end, *args)))
+            if len(pending) >= 2 * workers:
+                size, future = pending.popleft()
+                yield future.result()
+                progress.update(size)
+        while pending:
+            size, future = pending.popleft()
+            yield future.result()
+            progress.update(size)
+    progress.close()
@@ -1,5 +1,32 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 
+from LazyModule import LazyModule
+
+# tylko funkcje wektorowe (ładowanie danych) potrzebują numpy, benchmark importuje ten moduł bez niego
+np = LazyModule("numpy")
+
+START_DATE = datetime(2020, 1, 1)
+
+
+def _validate(hour, days_offset):
+    if not (0 <= hour <= 23):
+        raise ValueError("Godzina musi być w zakresie 0-23")
+    if days_offset < 0:
+        raise ValueError("Liczba dni musi być liczbą naturalną (>=0)")
+
+
+@lru_cache(maxsize=None)
+def generate_datetime(hour: int = 1, days_offset: int = 0) -> datetime:
+    """
+    Zwraca datetime dla godziny (0-23) i liczby dni od 2020-01-01, bez formatowania do tekstu.
+    Wynik jest zapamiętywany, bo możliwych par (godzina, dzień) jest niewiele.
+    """
+    _validate(hour, days_offset)
+    return START_DATE + timedelta(days=days_offset, hours=hour)
+
+
+@lru_cache(maxsize=None)
 def generate_timestamp(hour: int = 1, days_offset: int = 0, timestamp = False) -> str|int:
     """
     Generuje timestamp na podstawie godziny (0-23) i liczby dni od 2020-01-01.
@@ -7,16 +34,31 @@ def generate_timestamp(hour: int = 1, days_offset: int = 0, timestamp = False) -
     :param hour: Godzina (0-23)
     :param days_offset: Liczba dni od 2020-01-01 (liczba naturalna)
     """
-    if not (0 <= hour <= 23):
-        raise ValueError("Godzina musi być w zakresie 0-23")
-    if days_offset < 0:
-        raise ValueError("Liczba dni musi być liczbą naturalną (>=0)")
+    result_date = generate_datetime(hour, days_offset)
 
-    start_date = datetime(2020, 1, 1)
-    result_date = start_date + timedelta(days=days_offset)
-    result_date = result_date.replace(hour=hour, minute=0, second=0)
-    
     if timestamp:
         return int(result_date.timestamp())
-    
-    return result_date.strftime("%Y-%m-%d %H:%M:%S")
\ No newline at end of file
+
+    return result_date.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def generate_datetimes(hours, days_offsets) -> "np.ndarray":
+    """
+    Wektorowa wersja generate_datetime: tablice godzin i dni od 2020-01-01 na tablicę datetime64[s].
+
+    :param hours: Tablica godzin (0-23)
+    :param days_offsets: Tablica liczby dni od 2020-01-01 (liczby naturalne)
+    """
+    hours = np.asarray(hours, dtype=np.int64)
+    days_offsets = np.asarray(days_offsets, dtype=np.int64)
+    if np.any((hours < 0) | (hours > 23)):
+        raise ValueError("Godzina musi być w zakresie 0-23")
+    if np.any(days_offsets < 0):
+        raise ValueError("Liczba dni musi być liczbą naturalną (>=0)")
+
+    return np.datetime64(START_DATE, "s") + days_offsets.astype("timedelta64[D]") + hours.astype("timedelta64[h]")
+
+
+def generate_epoch_millis(hours, days_offsets) -> "np.ndarray":
+    """Jak generate_datetimes, ale zwraca milisekundy od epoki (UTC) jako int64."""
+    return generate_datetimes(hours, days_offsets).astype("datetime64[ms]").astype(np.int64)
@@ -1,15 +1,35 @@
-import psycopg2
-import pymongo
-import cassandra.cluster
-import mariadb
 import argparse
+import collections
+import contextlib
+import copy
 import csv
+import io
+import itertools
 import os
-import timeit
-import matplotlib.pyplot as plt
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+from BackendRegistry import BackendRegistry
+from BenchmarkOptions import BenchmarkOptions, COPY_BUFFERS, FETCH_MODES, MONGO_WRITES, QUERY_MODES, TRANSACTION_MODES
+from BenchmarkResult import BenchmarkResult
+from CommandTimer import CommandTimer
+from ConnectionRegistry import ConnectionRegistry
+from CopyStream import CopyStream
 from DataProvider import DataProvider
 from Database import Database
+from LatencyHistogram import LatencyHistogram
+from LazyModule import LazyModule
+from ResourceUsage import ResourceUsage
+from ResultStore import ResultStore
+from RunMonitor import BenchmarkCancelled
+from ServerStats import ServerStats
+from WriteChunker import WriteChunker
+
+psycopg2 = LazyModule("psycopg2", "extras")
+pymongo = LazyModule("pymongo")
+cassandra = LazyModule("cassandra", "cluster", "concurrent")
+plt = LazyModule("matplotlib.pyplot")
 
 def log_execution_time(db_type, queries, execution_time):
     """Log execution time to a CSV file."""
@@ -18,35 +38,58 @@ def log_execution_time(db_type, queries, execution_time):
         writer = csv.writer(file)
         writer.writerow([db_type, "; ".join(queries), execution_time])
 
-def save_test_result(db_type, test_name, number_of_queries, execution_time):
-    folder_path = f"./results/{test_name}/"
-    os.makedirs(folder_path, exist_ok=True)
-    file_path = os.path.join(folder_path, f"{db_type}.csv")
+EXECUTE_VALUES_PAGE_SIZE = 1000
+CASSANDRA_STATEMENT_CONCURRENCY = 100
+CASSANDRA_DEFAULT_FETCH_SIZE = 5000
 
-    with open(file_path, "a", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow([number_of_queries, execution_time])
+PERCENTILE_STYLES = {"p50": "-", "p99": "--", "p99.9": ":"}
+CPU_STYLES = {"cpu_user": "-", "cpu_sys": "--"}
+# phases that split up one iteration, reported as a share of its average latency
+BREAKDOWN_PHASES = ["send", "execute", "server", "fetch", "client"]
 
-    all_files = [f for f in os.listdir(folder_path) if f.endswith(".csv")]
+results = ResultStore()
 
-    plt.figure(figsize=(10, 6))
-    for filename in all_files:
-        full_path = os.path.join(folder_path, filename)
-        db_label = filename.replace(".csv", "")
 
-        x_vals = []
-        y_vals = []
+def result_label(db_type, options=None, mongo_insert=False):
+    """
+    Results of non-default query and transaction modes are kept in their own series, e.g.
+    `postgres_copy` or `mariadb_commit`; for Mongo the write modes of insert tests (`mongo_insert`)
+    are, e.g. `mongo_bulk_raw`.
+    """
+    if options is None:
+        return db_type
+    label = db_type
+    if db_type == "mongo":
+        # query and transaction modes do not apply to Mongo, the write modes only to its insert tests
+        if not mongo_insert:
+            return label
+        if options.mongo_write != "insert_many":
+            label += f"_{options.mongo_write}"
+        if options.mongo_raw:
+            label += "_raw"
+        return label
+    if options.query_mode != "literal":
+        label += f"_{options.query_mode}"
+    if options.transaction_mode != "single":
+        label += f"_{options.transaction_mode}"
+    return label
 
-        with open(full_path, "r") as f:
-            reader = csv.reader(f)
-            for row in reader:
-                try:
-                    x_vals.append(int(row[0]))
-                    y_vals.append(float(row[1]))
-                except ValueError:
-                    continue
 
-        sorted_pairs = sorted(zip(x_vals, y_vals), key=lambda pair: pair[0])
+def save_test_result(db_type, test_name, number_of_queries, result, options=None):
+    """Store `result`; a run in which every iteration failed has no times and fails instead."""
+    if not result.iterations:
+        raise RuntimeError(f"{db_type} {test_name}: no iteration succeeded ({result.errors} failed), nothing saved")
+    results.append(db_type, test_name, number_of_queries, result, options)
+
+
+def render_plots(test_name, store=None):
+    """Render the average time, latency percentile and client CPU plots of a test from the results store."""
+    store = store or results
+    folder_path = f"./results/{test_name}/"
+    os.makedirs(folder_path, exist_ok=True)
+
+    plt.figure(figsize=(10, 6))
+    for db_label, sorted_pairs in store.series(test_name, "avg").items():
         x_vals, y_vals = zip(*sorted_pairs)
 
         plt.plot(x_vals, y_vals, marker='o', label=db_label)
@@ -61,78 +104,646 @@ def save_test_result(db_type, test_name, number_of_queries, execution_time):
     plt.savefig(os.path.join(folder_path, f"{test_name}.png"))
     plt.close()
 
+    plt.figure(figsize=(10, 6))
+    for column, style in PERCENTILE_STYLES.items():
+        for db_label, sorted_pairs in store.series(test_name, column).items():
+            x_vals, y_vals = zip(*sorted_pairs)
+            plt.plot(x_vals, y_vals, linestyle=style, marker='o', label=f"{db_label} {column}")
 
-def connect_to_postgresql(db_name, user, password, host="localhost", port=5432):
-    return psycopg2.connect(database=db_name, user=user, password=password, host=host, port=port)
+    plt.xlabel("Number of Records")
+    plt.ylabel("Latency (s)")
+    plt.title(f"Latency Percentiles for Test: {test_name}")
+    plt.legend()
+    plt.grid(True)
 
+    plt.tight_layout()
+    plt.savefig(os.path.join(folder_path, f"{test_name}_percentiles.png"))
+    plt.close()
 
-def connect_to_mongodb(host="localhost", port=27017):
-    return pymongo.MongoClient(host, port)
+    # client CPU next to latency, to tell client overhead from database time
+    figure, (latency_axes, cpu_axes) = plt.subplots(1, 2, figsize=(14, 6))
+    for db_label, sorted_pairs in store.series(test_name, "avg").items():
+        x_vals, y_vals = zip(*sorted_pairs)
+        latency_axes.plot(x_vals, y_vals, marker='o', label=db_label)
+    for column, style in CPU_STYLES.items():
+        for db_label, sorted_pairs in store.series(test_name, column).items():
+            x_vals, y_vals = zip(*sorted_pairs)
+            cpu_axes.plot(x_vals, y_vals, linestyle=style, marker='o', label=f"{db_label} {column}")
 
+    latency_axes.set_xlabel("Number of Records")
+    latency_axes.set_ylabel("Execution Time (s)")
+    latency_axes.set_title("Average Execution Time")
+    cpu_axes.set_xlabel("Number of Records")
+    cpu_axes.set_ylabel("Client CPU Time per Run (s)")
+    cpu_axes.set_title("Client CPU Time")
+    for axes in (latency_axes, cpu_axes):
+        axes.legend()
+        axes.grid(True)
 
-def connect_to_cassandra(contact_points=["localhost"], port=9042):
-    cluster = cassandra.cluster.Cluster(contact_points, port=port)
-    return cluster.connect()
+    figure.suptitle(f"Client Overhead for Test: {test_name}")
+    figure.tight_layout()
+    figure.savefig(os.path.join(folder_path, f"{test_name}_client.png"))
+    plt.close(figure)
 
 
-def connect_to_mariadb(db_name, user, password, host="localhost", port=3306):
-    return mariadb.connect(user=user, password=password, host=host, port=port, database=db_name)
+def run_workers(open_worker, number_of_query_executions, concurrency=1, target_qps=None, monitor=None,
+                trace_allocations=False):
+    """
+    Spread iterations across `concurrency` threads. Each worker calls `open_worker()` to get its own
+    connection and returns an `(execute_query, close)` pair; the time this takes is reported as
+    connect time, apart from query time; every call of `execute_query` is timed
+    separately into a LatencyHistogram. `open_worker` may also return a third callable, run
+    untimed after every iteration (e.g. to roll back to a savepoint). `execute_query` may return a
+    dict of named phase durations (e.g. time to first row), which get a histogram each. With `target_qps` the workers share one
+    schedule so the aggregate rate is capped. A `monitor` (RunMonitor) sees every iteration and can
+    stop the run, which then raises BenchmarkCancelled. Client CPU time of the workers, memory and
+    (with `trace_allocations`) allocations are measured from the moment all workers start. An
+    iteration that raises is printed and counted in the result's `errors`, not timed.
+    """
+    concurrency = max(1, min(concurrency, number_of_query_executions))
+    shares = [number_of_query_executions // concurrency + (1 if i < number_of_query_executions % concurrency else 0)
+              for i in range(concurrency)]
 
+    histogram = LatencyHistogram()
+    phases = {}
+    lock = threading.Lock()
+    slots = itertools.count()
+    clock = {}
+    connect_times = []
+    errors = [0]
+    usage = ResourceUsage(trace_allocations)
 
-def execute_sql_queries(connection, query, db_type, records_number, number_of_query_executions=1):
-    cursor = connection.cursor()
-    if db_type == "PostgreSQL":
-        cursor.execute("BEGIN")
-    elif db_type == "MariaDB":
-        cursor.execute("START TRANSACTION")
+    def start_clock():
+        usage.start()
+        clock["start"] = time.perf_counter()
+    barrier = threading.Barrier(concurrency, action=start_clock)
 
-    def execute_query():
+    def worker(share):
         try:
-            cursor.execute(query)
-        except Exception as e:
-            print(f"Error during execution: {e}")
-    connection.rollback()
-    execution_time = timeit.timeit(execute_query, number=number_of_query_executions)
-    avg_execution_time = execution_time / number_of_query_executions
-    print(f"{db_type} average execution time per {number_of_query_executions} calls: {avg_execution_time} seconds for {records_number} records")
-    log_execution_time(db_type, query, execution_time)
-
-    return avg_execution_time
-
-def execute_cassandra_queries(session, query, db_type, records_number, number_of_query_executions=1):
-    def execute_query():
+            connect_start = time.perf_counter()
+            execute_query, close, *after_iteration = open_worker()
+            connect_times.append(time.perf_counter() - connect_start)
+        except Exception:
+            barrier.abort()
+            raise
         try:
-            session.execute(query)
-        except Exception as e:
-            print(f"Error during execution: {e}")
+            barrier.wait()
+            cpu = usage.thread_started()
+            worker_histogram = LatencyHistogram()
+            worker_phases = {}
+            failed = 0
+            for _ in range(share):
+                if monitor and monitor.cancelled:
+                    break
+                if target_qps:
+                    with lock:
+                        slot = next(slots)
+                    delay = clock["start"] + slot / target_qps - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                start = time.perf_counter()
+                try:
+                    measured_phases = execute_query()
+                except Exception as e:
+                    print(f"Error during execution: {e}")
+                    failed += 1
+                else:
+                    latency = time.perf_counter() - start
+                    worker_histogram.record(latency)
+                    if monitor:
+                        monitor.iteration_done(latency)
+                    for name, duration in (measured_phases or {}).items():
+                        worker_phases.setdefault(name, LatencyHistogram()).record(duration)
+                for reset in after_iteration:
+                    reset()
+            usage.thread_finished(cpu)
+            with lock:
+                histogram.merge(worker_histogram)
+                errors[0] += failed
+                for name, phase_histogram in worker_phases.items():
+                    phases.setdefault(name, LatencyHistogram()).merge(phase_histogram)
+        finally:
+            close()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(worker, share) for share in shares]
+        for future in futures:
+            future.result()
+    wall_time = time.perf_counter() - clock["start"]
+    usage.stop()
+    if monitor and monitor.cancelled:
+        raise BenchmarkCancelled()
+
+    return BenchmarkResult(histogram, wall_time, concurrency, phases, sum(connect_times) / len(connect_times),
+                           peak_memory=usage.peak_memory, resources=usage.summary(), errors=errors[0])
+
+
+def report_result(label, result, records_number=None):
+    records = f" for {records_number} records" if records_number is not None else ""
+    print(f"{label} average execution time per {result.iterations} calls: {result.avg_execution_time} seconds{records}")
+    print(f"{label} throughput with {result.concurrency} workers: {result.throughput:.2f} ops/s")
+    print(f"{label} connect time: {result.connect_time:.6f}s")
+    if result.errors:
+        print(f"{label} failed iterations: {result.errors} (not included in the latencies)")
+    if not result.iterations:
+        return
+    if result.peak_memory is not None:
+        print(f"{label} peak client memory: {result.peak_memory / (1024 * 1024):.1f} MB")
+    resources = result.resources
+    if resources.get("cpu_user") is not None:
+        rss_delta = resources["rss_delta"]
+        cpu_sys = resources["cpu_sys"]
+        print(f"{label} client CPU ({resources['cpu_scope']}): user={resources['cpu_user']:.3f}s"
+              + (f", sys={cpu_sys:.3f}s" if cpu_sys is not None else "")
+              + (f", RSS delta={rss_delta / (1024 * 1024):.1f} MB" if rss_delta is not None else ""))
+    if resources.get("alloc_peak") is not None:
+        print(f"{label} allocations: peak={resources['alloc_peak'] / (1024 * 1024):.1f} MB, "
+              f"blocks={resources['alloc_blocks']}")
+    print(f"{label} latency: " + ", ".join(f"{name}={value:.6f}s" for name, value in result.percentiles().items()))
+    for phase, histogram in result.phases.items():
+        print(f"{label} {phase}: avg={histogram.mean:.6f}s, "
+              + ", ".join(f"{name}={value:.6f}s" for name, value in histogram.summary().items()))
+    breakdown = {phase: result.phase_mean(phase) for phase in BREAKDOWN_PHASES if result.phase_mean(phase) is not None}
+    if breakdown and result.avg_execution_time:
+        print(f"{label} breakdown of an iteration: " + ", ".join(
+            f"{phase}={mean:.6f}s ({mean / result.avg_execution_time:.0%})" for phase, mean in breakdown.items()))
+
+
+def with_connection(connect, release, use):
+    """Call `use(connection)` on a connection of its own, outside the timed run."""
+    connection = connect()
+    try:
+        return use(connection)
+    finally:
+        release(connection)
 
-    execution_time = timeit.timeit(execute_query, number=number_of_query_executions)
-    avg_execution_time = execution_time / number_of_query_executions
-    print(f"{db_type} average execution time per {number_of_query_executions} calls: {avg_execution_time} seconds for {records_number} records")
-    log_execution_time(db_type, [query], execution_time)
 
-    return avg_execution_time
+def report_server_stats(label, result, server_stats):
+    result.server_stats = server_stats.stats
+    summary = server_stats.summary()
+    print(f"{label} server stats: " + (", ".join(f"{name}={value:g}" for name, value in summary.items())
+                                       or "stored with the result"))
 
 
-def execute_mongo_queries(client, db_name, query, number_of_query_executions=1):
-    db = client[db_name]
-    collection_name, operation, params, limit = query
-    collection = db[collection_name]
+def materialize_rows(fetch_first, fetch_rest, fetch_mode, start, executed=None):
+    """
+    Pull the result of an already executed query according to `fetch_mode` and return the time to
+    the first and to the last row, both measured from `start`. With `executed`, the moment the
+    query call returned, the time spent pulling rows after it is the `fetch` phase.
+    """
+    if fetch_mode == "none":
+        return {}
+    fetch_first()
+    phases = {"time_to_first_row": time.perf_counter() - start}
+    if fetch_mode != "first_row":
+        fetch_rest()
+    finished = time.perf_counter()
+    phases["time_to_last_row"] = finished - start
+    if executed is not None:
+        phases["fetch"] = finished - executed
+    return phases
 
-    def execute_queries():
-        if operation == "find" and limit is not None:
-            collection.find(*params).limit(limit)
-            # print(list(res))
+
+def literal_statements(query):
+    """A literal query as a list of statements (a single string, or the chunks of a split write), else None."""
+    if isinstance(query, str):
+        return [query]
+    if all(isinstance(statement, str) for statement in query):
+        return list(query)
+    return None
+
+
+def single_select(literal, statements):
+    """`(sql, params)` when a query is a single SELECT that can run on a server-side cursor, else None."""
+    if literal is not None:
+        if len(literal) == 1 and literal[0].lstrip().upper().startswith("SELECT"):
+            return literal[0], None
+        return None
+    if len(statements) == 1 and statements[0][0].lstrip().upper().startswith("SELECT") \
+            and len(statements[0][1]) == 1:
+        return statements[0][0], statements[0][1][0]
+    return None
+
+
+def drain(rows):
+    """Iterate over `rows` without keeping them, like a consumer that processes rows one by one."""
+    collections.deque(rows, maxlen=0)
+
+
+def execute_sql_statements(cursor, statements, db_type):
+    """
+    Run `(template, params)` pairs from DataProvider.get_*_statements. PostgreSQL `VALUES %s`
+    templates always go through execute_values, as they take whole rows even for a single one;
+    otherwise one parameter tuple goes through execute(), a parameter stream through executemany.
+    `COPY ... FROM STDIN` templates stream their rows (or pre-rendered text) with copy_expert.
+    """
+    for template, params in statements:
+        if template.lstrip().upper().startswith("COPY"):
+            cursor.copy_expert(template, io.StringIO(params) if isinstance(params, str) else CopyStream(params))
+        elif db_type == "PostgreSQL" and "VALUES %s" in template:
+            psycopg2.extras.execute_values(cursor, template, params, page_size=EXECUTE_VALUES_PAGE_SIZE)
+        elif len(params) == 1:
+            cursor.execute(template, params[0])
         else:
-            getattr(collection, operation)(*params)
-            # print(list(res))
+            cursor.executemany(template, params)
+
+
+def execute_sql_queries(connect, query, db_type, records_number, number_of_query_executions=1, options=None,
+                        release=None):
+    """
+    `query` is either a literal SQL string or a list of `(template, params)` statements. `release`
+    hands a connection back (to a pool); by default it is closed.
+
+    `options.transaction_mode` decides what a timed iteration covers:
+    - single: all iterations run in one transaction that is never committed;
+    - commit: every iteration is committed, the commit time is reported as the `commit` phase;
+    - savepoint: every iteration is rolled back to a savepoint (untimed), so each one sees the same data;
+    - autocommit: every statement commits on its own.
+
+    In the stream fetch mode a PostgreSQL SELECT runs on a named (server-side) cursor that fetches
+    `fetch_size` rows at a time, and MariaDB uses an unbuffered cursor.
+
+    Every iteration reports the time spent in execute() (sending, server work and, for client-side
+    cursors, receiving the result) as the `execute` phase, and pulling rows as the `fetch` phase.
+
+    With `options.server_stats` the statements are analyzed after the run, see ServerStats.
+    """
+    options = options or BenchmarkOptions()
+    release = release or (lambda connection: connection.close())
+    literal = literal_statements(query)
+
+    transaction_mode = options.transaction_mode
+    stream = options.fetch_mode == "stream"
+    server_side_query = single_select(literal, query) if stream and db_type == "PostgreSQL" else None
+
+    def open_worker():
+        connection = connect()
+        cursor = connection.cursor(buffered=False) if stream and db_type == "MariaDB" else connection.cursor()
+        if transaction_mode == "single":
+            if db_type == "PostgreSQL":
+                cursor.execute("BEGIN")
+            elif db_type == "MariaDB":
+                cursor.execute("START TRANSACTION")
+
+        if stream:
+            cursor.arraysize = options.fetch_size
+
+        def fetch_rest():
+            if options.fetch_mode == "all":
+                cursor.fetchall()
+            else:
+                drain(iter(cursor.fetchmany, []))
+
+        def stream_rows(start):
+            # a named cursor must be held across commits to be usable in autocommit mode
+            withhold = transaction_mode == "autocommit"
+            with connection.cursor(name="benchmark_stream", withhold=withhold) as server_cursor:
+                server_cursor.itersize = options.fetch_size
+                server_cursor.execute(*server_side_query)
+                executed = time.perf_counter()
+                rows = iter(server_cursor)
+                phases = materialize_rows(lambda: next(rows, None), lambda: drain(rows), options.fetch_mode, start,
+                                          executed)
+                phases["execute"] = executed - start
+                return phases
+
+        def execute_query():
+            try:
+                start = time.perf_counter()
+                phases = {}
+                if server_side_query is not None:
+                    phases = stream_rows(start)
+                else:
+                    if literal is not None:
+                        for statement in literal:
+                            cursor.execute(statement)
+                    else:
+                        execute_sql_statements(cursor, query, db_type)
+                    executed = time.perf_counter()
+                    phases = {"execute": executed - start}
+                    if cursor.description is not None:
+                        phases.update(materialize_rows(cursor.fetchone, fetch_rest, options.fetch_mode, start,
+                                                       executed))
+                if transaction_mode == "commit":
+                    phases["statement"] = time.perf_counter() - start
+                    commit_start = time.perf_counter()
+                    connection.commit()
+                    phases["commit"] = time.perf_counter() - commit_start
+                return phases
+            except Exception:
+                # the failure is reported by run_workers, the iteration is not timed
+                if transaction_mode == "commit":
+                    connection.rollback()
+                raise
+
+        def rollback_iteration():
+            cursor.execute("ROLLBACK TO SAVEPOINT iteration")
+
+        def close():
+            if transaction_mode == "autocommit":
+                connection.autocommit = False
+            else:
+                connection.rollback()
+            release(connection)
+
+        connection.rollback()
+        if transaction_mode == "autocommit":
+            connection.autocommit = True
+        elif transaction_mode == "savepoint":
+            cursor.execute("SAVEPOINT iteration")
+            return execute_query, close, rollback_iteration
+        return execute_query, close
+
+    server_stats = ServerStats(db_type) if options.server_stats else None
+    if server_stats:
+        with_connection(connect, release, server_stats.snapshot)
+    result = run_workers(open_worker, number_of_query_executions, options.concurrency, options.target_qps,
+                         options.monitor, options.trace_allocations)
+    report_result(db_type, result, records_number)
+    if server_stats:
+        statements = [(statement, None) for statement in literal] if literal is not None else query
+        with_connection(connect, release, lambda connection: server_stats.collect_sql(connection, statements))
+        report_server_stats(db_type, result, server_stats)
+    log_execution_time(db_type, query, result.wall_time)
+
+    return result
+
+def run_cassandra_window(session, query, number_of_query_executions, window, target_qps=None, parameters=None,
+                         monitor=None, trace_allocations=False):
+    """
+    Keep up to `window` requests in flight on one session with `execute_async`. Submitting blocks
+    while the window is full, and each request's latency is recorded from its future callback;
+    failed requests are counted in the result's `errors` instead.
+    """
+    histogram = LatencyHistogram()
+    lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(window)
+    done = threading.Event()
+    pending = [number_of_query_executions]
+    errors = [0]
+
+    def finish(latency):
+        with lock:
+            if latency is None:
+                errors[0] += 1
+            else:
+                histogram.record(latency)
+            pending[0] -= 1
+            if pending[0] == 0:
+                done.set()
+        in_flight.release()
+        if monitor and latency is not None:
+            monitor.iteration_done(latency)
 
-    execution_time = timeit.timeit(execute_queries, number=number_of_query_executions)
-    avg_execution_time = execution_time / number_of_query_executions
-    print(f"MongoDB average execution time per {number_of_query_executions} calls: {avg_execution_time} seconds")
-    log_execution_time("MongoDB", query, execution_time)
+    def on_success(rows, start):
+        finish(time.perf_counter() - start)
 
-    return avg_execution_time
+    def on_error(error, start):
+        print(f"Error during execution: {error}")
+        finish(None)
+
+    usage = ResourceUsage(trace_allocations).start()
+    # callbacks run on the driver's event loop, which only the process CPU time includes; the
+    # submitting thread's own time is the fallback when another run overlaps
+    cpu = usage.thread_started()
+    started = time.perf_counter()
+    for slot in range(number_of_query_executions):
+        if monitor and monitor.cancelled:
+            # requests never sent will not complete
+            with lock:
+                pending[0] -= number_of_query_executions - slot
+                if pending[0] == 0:
+                    done.set()
+            break
+        if target_qps:
+            delay = started + slot / target_qps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        in_flight.acquire()
+        start = time.perf_counter()
+        future = session.execute_async(query, parameters)
+        future.add_callbacks(on_success, on_error, callback_args=(start,), errback_args=(start,))
+    if number_of_query_executions:
+        done.wait()
+    wall_time = time.perf_counter() - started
+    usage.thread_finished(cpu)
+    usage.stop()
+    if monitor and monitor.cancelled:
+        raise BenchmarkCancelled()
+
+    return BenchmarkResult(histogram, wall_time, window, peak_memory=usage.peak_memory, resources=usage.summary(),
+                           errors=errors[0])
+
+
+def prepare_cassandra_statements(session, statements):
+    return [(session.prepare(template), params) for template, params in statements]
+
+
+def execute_cassandra(session, statement, parameters=None, phases=None):
+    """
+    session.execute, adding to `phases` the time to hand the request to a connection (`send`: binding
+    and encoding) and the time until its ResponseFuture has the first page (`server`: network, server
+    work and decoding the page).
+    """
+    if phases is None:
+        return session.execute(statement, parameters)
+    start = time.perf_counter()
+    future = session.execute_async(statement, parameters)
+    sent = time.perf_counter()
+    result = future.result()
+    phases["send"] = phases.get("send", 0.0) + sent - start
+    phases["server"] = phases.get("server", 0.0) + time.perf_counter() - sent
+    return result
+
+
+def execute_cassandra_statements(session, prepared_statements, phases=None):
+    """
+    Run prepared `(statement, params)` pairs. A parameter stream is executed with
+    execute_concurrent_with_args; returns the result of the last single-row execution.
+    """
+    result = None
+    for statement, params in prepared_statements:
+        if len(params) == 1:
+            result = execute_cassandra(session, statement, params[0], phases)
+        else:
+            start = time.perf_counter()
+            cassandra.concurrent.execute_concurrent_with_args(
+                session, statement, params, concurrency=CASSANDRA_STATEMENT_CONCURRENCY)
+            if phases is not None:
+                # requests are encoded while others are in flight, so it all counts as server time
+                phases["server"] = phases.get("server", 0.0) + time.perf_counter() - start
+            result = None
+    return result
+
+
+def execute_cassandra_queries(connect, query, db_type, records_number, number_of_query_executions=1, options=None,
+                              release=None):
+    """
+    `query` is either a literal CQL string or a list of `(template, params)` statements to prepare.
+    `release` hands a session back; by default its cluster is shut down. Iterations report the
+    `send`, `server` and `fetch` phases, see execute_cassandra().
+    """
+    options = options or BenchmarkOptions()
+    release = release or (lambda session: session.cluster.shutdown())
+    literal = literal_statements(query)
+
+    def open_worker():
+        session = connect()
+        session.default_fetch_size = \
+            options.fetch_size if options.fetch_mode == "stream" else CASSANDRA_DEFAULT_FETCH_SIZE
+        prepared_statements = None if literal is not None else prepare_cassandra_statements(session, query)
+
+        def execute_query():
+            start = time.perf_counter()
+            phases = {}
+            if prepared_statements is None:
+                result = None
+                for statement in literal:
+                    result = execute_cassandra(session, statement, None, phases)
+            else:
+                result = execute_cassandra_statements(session, prepared_statements, phases)
+            executed = time.perf_counter()
+            if result is None or not result.column_names:
+                return phases
+            rows = iter(result)
+            fetch_rest = (lambda: list(rows)) if options.fetch_mode == "all" else (lambda: drain(rows))
+            phases.update(materialize_rows(lambda: next(rows, None), fetch_rest, options.fetch_mode, start,
+                                           executed))
+            return phases
+        return execute_query, lambda: release(session)
+
+    if options.cassandra_window:
+        connect_start = time.perf_counter()
+        session = connect()
+        connect_time = time.perf_counter() - connect_start
+        try:
+            statement, parameters = None, None
+            if literal is not None:
+                if len(literal) != 1:
+                    raise ValueError("--cassandra-window needs a write that fits in one chunk")
+                statement = literal[0]
+            else:
+                if len(query) != 1 or len(query[0][1]) != 1:
+                    raise ValueError("--cassandra-window needs a single-statement test in parameterized mode")
+                [(statement, params)] = prepare_cassandra_statements(session, query)
+                parameters = params[0]
+            result = run_cassandra_window(session, statement, number_of_query_executions,
+                                          options.cassandra_window, options.target_qps, parameters, options.monitor,
+                                          options.trace_allocations)
+            result.connect_time = connect_time
+        finally:
+            release(session)
+    else:
+        result = run_workers(open_worker, number_of_query_executions, options.concurrency, options.target_qps,
+                             options.monitor, options.trace_allocations)
+    report_result(db_type, result, records_number)
+    if options.server_stats:
+        server_stats = ServerStats(db_type)
+
+        def trace(session):
+            if literal is not None:
+                server_stats.collect_cassandra(session, [(statement, None) for statement in literal])
+            else:
+                server_stats.collect_cassandra(session, prepare_cassandra_statements(session, query))
+        with_connection(connect, release, trace)
+        report_server_stats(db_type, result, server_stats)
+    log_execution_time(db_type, [query], result.wall_time)
+
+    return result
+
+
+def execute_mongo_queries(connect, db_name, query, number_of_query_executions=1, options=None, release=None):
+    """
+    Iterations report the time pymongo's command monitoring saw between sending commands and
+    reading their replies as the `server` phase, the rest (encoding and decoding BSON, building
+    cursors) as the `client` phase.
+
+    With `options.mongo_write` "bulk", inserts go through one unordered bulk_write per chunk
+    (--chunk-rows sets the batch size), so the server does not have to apply them one after another.
+
+    pymongo adds an `_id` to inserted dict documents in place, so every worker inserts copies of its
+    own, and the generated `_id`s are dropped after each iteration so the next one inserts new documents.
+    """
+    options = options or BenchmarkOptions()
+    release = release or (lambda client: client.close())
+    # chunked writes come as a list of queries on the same collection
+    queries = query if isinstance(query, list) else [query]
+    collection_name, operation, params, limit = queries[0]
+    # copies and bulk requests are made before the run, so only the write itself is timed
+    workers = max(1, min(options.concurrency, number_of_query_executions))
+    if any(isinstance(document, dict) for document in inserted_documents(queries)):
+        worker_queries = [queries] + [copy.deepcopy(queries) for _ in range(workers - 1)]
+    else:
+        # RawBSONDocument is immutable and gets no `_id` from pymongo, it can be shared
+        worker_queries = [queries] * workers
+    worker_batches = [None] * workers
+    if operation == "insert_many" and options.mongo_write == "bulk":
+        worker_batches = [[[pymongo.InsertOne(document) for document in chunk_params[0]]
+                           for _, _, chunk_params, _ in own_queries] for own_queries in worker_queries]
+    worker_sets = list(zip(worker_queries, worker_batches))
+
+    def open_worker():
+        own_queries, batches = worker_sets.pop()
+        generated = [document for document in inserted_documents(own_queries)
+                     if isinstance(document, dict) and "_id" not in document]
+        client = connect()
+        collection = client[db_name][collection_name]
+
+        def drop_generated_ids():
+            for document in generated:
+                document.pop("_id", None)
+
+        def execute_queries():
+            start = time.perf_counter()
+            CommandTimer.reset()
+            phases = {}
+            if operation == "find":
+                cursor = collection.find(*params)
+                if limit is not None:
+                    cursor = cursor.limit(limit)
+                if options.fetch_mode == "stream":
+                    cursor = cursor.batch_size(options.fetch_size)
+            elif operation == "aggregate":
+                kwargs = {"batchSize": options.fetch_size} if options.fetch_mode == "stream" else {}
+                cursor = collection.aggregate(*params, **kwargs)
+            else:
+                if operation == "insert_many" and options.mongo_write == "bulk":
+                    for batch in batches:
+                        collection.bulk_write(batch, ordered=False)
+                else:
+                    for _, _, chunk_params, _ in own_queries:
+                        getattr(collection, operation)(*chunk_params)
+                cursor = None
+            if cursor is not None:
+                fetch_rest = (lambda: list(cursor)) if options.fetch_mode == "all" else (lambda: drain(cursor))
+                phases = materialize_rows(lambda: next(cursor, None), fetch_rest, options.fetch_mode, start)
+            server_time = CommandTimer.elapsed()
+            phases["server"] = server_time
+            phases["client"] = max(0.0, time.perf_counter() - start - server_time)
+            return phases
+        return execute_queries, lambda: release(client), drop_generated_ids
+
+    result = run_workers(open_worker, number_of_query_executions, options.concurrency, options.target_qps,
+                         options.monitor, options.trace_allocations)
+    report_result("MongoDB", result)
+    if options.server_stats:
+        server_stats = ServerStats("MongoDB")
+        with_connection(connect, release, lambda client: server_stats.collect_mongo(client[db_name], queries))
+        report_server_stats("MongoDB", result, server_stats)
+    log_execution_time("MongoDB", query, result.wall_time)
+
+    return result
+
+
+def inserted_documents(queries):
+    """The documents the insert_one/insert_many queries of `queries` write."""
+    documents = []
+    for _, operation, params, _ in queries:
+        if operation == "insert_many":
+            documents.extend(params[0])
+        elif operation == "insert_one":
+            documents.append(params[0])
+    return documents
 
 
 def load_database_credentials() -> dict:
@@ -163,20 +774,66 @@ def load_database_credentials() -> dict:
     }
 
 
-def main(db_type, records_number, test_name, number_of_query_executions):
+def main(db_type, records_number, test_name, number_of_query_executions, options=None, registry=None):
     credentials = load_database_credentials()
 
-    if db_type == "postgres":
-        run_postgres(credentials, records_number, test_name, number_of_query_executions)
-    elif db_type == "mongo":
-        run_mongo(credentials, records_number, test_name, number_of_query_executions)
-    elif db_type == "cassandra":
-        run_cassandra(credentials, records_number, test_name, number_of_query_executions)
-    elif db_type == "mariadb":
-        run_mariadb(credentials, records_number, test_name, number_of_query_executions)
+    backends.load(db_type)(credentials, records_number, test_name, number_of_query_executions, options=options,
+                           registry=registry)
+
+
+@contextlib.contextmanager
+def connection_registry(registry=None):
+    """Use the given registry, or a temporary one that is closed when the run is done."""
+    if registry is not None:
+        yield registry
+        return
+    registry = ConnectionRegistry(warm_up=False)
+    try:
+        yield registry
+    finally:
+        registry.close_all()
+
+
+def pooled_connection(registry, db_type, database, options=None):
+    """
+    `(connect, release, pool_time)`: callables that take worker connections from the registry, and
+    the time spent creating its pool before the run (None when an existing pool is used).
+    """
+    size = options.concurrency if options else 1
+    pool_time = registry.prepare(db_type, database, size)
+
+    def connect():
+        return registry.acquire(db_type, database, size)
+
+    def release(connection):
+        registry.release(db_type, database, connection)
+    return connect, release, pool_time
+
+
+def write_chunker(db_type, options=None):
+    options = options or BenchmarkOptions()
+    return WriteChunker(db_type, options.chunk_rows, options.chunk_bytes)
+
+
+def record_setup_time(label, result, phase, seconds):
+    """
+    Keep the time of a preparation step outside the timed run as a phase with one sample, e.g.
+    `build` for DataProvider generating the queries.
+    """
+    result.phases[phase] = LatencyHistogram()
+    result.phases[phase].record(seconds)
+    print(f"{label} {phase}: {seconds:.6f}s")
+
 
+def record_chunking(label, result, chunker):
+    """Keep the largest write chunk with the result; nothing is recorded when no write was split."""
+    if chunker.splits:
+        result.chunk_rows = chunker.largest
+        print(f"{label} write chunk size: up to {chunker.largest} rows, {chunker.max_bytes} bytes")
 
-def run_mariadb(credentials, records_number, test_name, number_of_query_executions, return_time=False):
+
+def run_mariadb(credentials, records_number, test_name, number_of_query_executions, return_time=False, options=None,
+                registry=None):
     mariadb = Database(
         credentials["mariadb"]["host"],
         credentials["mariadb"]["db_name"],
@@ -184,50 +841,86 @@ def run_mariadb(credentials, records_number, test_name, number_of_query_executio
         credentials["mariadb"]["user"],
         credentials["mariadb"]["password"]
     )
-    connection = connect_to_mariadb(
-        mariadb.db_name,
-        mariadb.user,
-        mariadb.password,
-        mariadb.host,
-        mariadb.port
-    )
-    queries = DataProvider.get_mariadb_queries(test_name, records_number)
-    execution_time = execute_sql_queries(connection, queries, "MariaDB", records_number, number_of_query_executions)
-    save_test_result('mariadb', test_name, records_number, execution_time)
-    connection.close()
+    chunker = write_chunker("mariadb", options)
+    build_start = time.perf_counter()
+    if options and options.query_mode == "parameterized":
+        queries = chunker.split_statements(DataProvider.get_mariadb_statements(test_name, records_number))
+    else:
+        queries = DataProvider.get_mariadb_queries(test_name, records_number, chunker)
+    build_time = time.perf_counter() - build_start
+    with connection_registry(registry) as registry:
+        connect, release, pool_time = pooled_connection(registry, "mariadb", mariadb, options)
+        result = execute_sql_queries(connect, queries, "MariaDB", records_number, number_of_query_executions, options,
+                                     release)
+    record_chunking("MariaDB", result, chunker)
+    record_setup_time("MariaDB", result, "build", build_time)
+    if pool_time is not None:
+        record_setup_time("MariaDB", result, "pool", pool_time)
+    save_test_result(result_label('mariadb', options), test_name, records_number, result, options)
     if return_time:
-        return execution_time
+        return result.avg_execution_time
 
 
-def run_cassandra(credentials, records_number, test_name, number_of_query_executions, return_time=False):
+def run_cassandra(credentials, records_number, test_name, number_of_query_executions, return_time=False, options=None,
+                  registry=None):
     cassandra = Database(
         credentials["cassandra"]["contact_points"][0],
         None,
         credentials["cassandra"]["port"]
     )
-    client = connect_to_cassandra([cassandra.host], cassandra.port)
-    query = DataProvider.get_cassandra_queries(test_name, records_number)
-    execution_time = execute_cassandra_queries(client, query, "Cassandra", records_number, number_of_query_executions)
-    save_test_result('cassandra', test_name, records_number, execution_time)
+    chunker = write_chunker("cassandra", options)
+    build_start = time.perf_counter()
+    if options and options.query_mode == "parameterized":
+        query = DataProvider.get_cassandra_statements(test_name, records_number)
+    else:
+        query = DataProvider.get_cassandra_queries(test_name, records_number, chunker)
+    build_time = time.perf_counter() - build_start
+    with connection_registry(registry) as registry:
+        connect, release, pool_time = pooled_connection(registry, "cassandra", cassandra, options)
+        result = execute_cassandra_queries(connect, query, "Cassandra", records_number, number_of_query_executions,
+                                           options, release)
+    record_chunking("Cassandra", result, chunker)
+    record_setup_time("Cassandra", result, "build", build_time)
+    if pool_time is not None:
+        record_setup_time("Cassandra", result, "pool", pool_time)
+    save_test_result(result_label('cassandra', options), test_name, records_number, result, options)
     if return_time:
-        return execution_time
+        return result.avg_execution_time
 
 
-def run_mongo(credentials, number_of_queries, test_name, number_of_query_executions, return_time=False):
+def run_mongo(credentials, number_of_queries, test_name, number_of_query_executions, return_time=False, options=None,
+              registry=None):
     mongo = Database(
         credentials["mongo"]["host"],
         None,
         credentials["mongo"]["port"]
     )
-    client = connect_to_mongodb(mongo.host, mongo.port)
-    queries = DataProvider.get_mongo_queries(test_name, number_of_queries)
-    execution_time = execute_mongo_queries(client, "instacart", queries, number_of_query_executions)
-    save_test_result('mongo', test_name, number_of_queries, execution_time)
+    chunker = write_chunker("mongo", options)
+    build_start = time.perf_counter()
+    queries = DataProvider.get_mongo_queries(test_name, number_of_queries, chunker)
+    build_time = time.perf_counter() - build_start
+    mongo_insert = (queries[0] if isinstance(queries, list) else queries)[1] == "insert_many"
+    encode_time = None
+    if options and options.mongo_raw and mongo_insert:
+        encode_start = time.perf_counter()
+        queries = DataProvider.encode_mongo_documents(queries)
+        encode_time = time.perf_counter() - encode_start
+    with connection_registry(registry) as registry:
+        connect, release, pool_time = pooled_connection(registry, "mongo", mongo, options)
+        result = execute_mongo_queries(connect, "instacart", queries, number_of_query_executions, options, release)
+    record_chunking("MongoDB", result, chunker)
+    record_setup_time("MongoDB", result, "build", build_time)
+    if pool_time is not None:
+        record_setup_time("MongoDB", result, "pool", pool_time)
+    if encode_time is not None:
+        record_setup_time("MongoDB", result, "encode", encode_time)
+    save_test_result(result_label('mongo', options, mongo_insert), test_name, number_of_queries, result, options)
     if return_time:
-        return execution_time
+        return result.avg_execution_time
 
 
-def run_postgres(credentials, records_number, test_name, number_of_query_executions, return_time=False):
+def run_postgres(credentials, records_number, test_name, number_of_query_executions, return_time=False, options=None,
+                 registry=None):
     postgres = Database(
         credentials["postgres"]["host"],
         credentials["postgres"]["db_name"],
@@ -235,19 +928,38 @@ def run_postgres(credentials, records_number, test_name, number_of_query_executi
         credentials["postgres"]["user"],
         credentials["postgres"]["password"]
     )
-    connection = connect_to_postgresql(
-        postgres.db_name,
-        postgres.user,
-        postgres.password,
-        postgres.host,
-        postgres.port
-    )
-    queries = DataProvider.get_postgres_queries(test_name, records_number)
-    execution_time = execute_sql_queries(connection, queries, "PostgreSQL", records_number, number_of_query_executions)
-    save_test_result('postgres', test_name, records_number, execution_time)
-    connection.close()
+    chunker = write_chunker("postgres", options)
+    build_start = time.perf_counter()
+    queries = None
+    if options and options.query_mode == "copy":
+        queries = DataProvider.get_postgres_copy(test_name, records_number)
+        if not queries:
+            print(f"Test {test_name} has no COPY variant, running it as literal SQL")
+            options = options.replace(query_mode="literal")
+        elif options.copy_buffer == "memory":
+            queries = [(copy_sql, CopyStream.render(rows)) for copy_sql, rows in queries]
+    elif options and options.query_mode == "parameterized":
+        queries = chunker.split_statements(DataProvider.get_postgres_statements(test_name, records_number))
+    if not queries:
+        queries = DataProvider.get_postgres_queries(test_name, records_number, chunker)
+    build_time = time.perf_counter() - build_start
+    with connection_registry(registry) as registry:
+        connect, release, pool_time = pooled_connection(registry, "postgres", postgres, options)
+        result = execute_sql_queries(connect, queries, "PostgreSQL", records_number, number_of_query_executions,
+                                     options, release)
+    record_chunking("PostgreSQL", result, chunker)
+    record_setup_time("PostgreSQL", result, "build", build_time)
+    if pool_time is not None:
+        record_setup_time("PostgreSQL", result, "pool", pool_time)
+    save_test_result(result_label('postgres', options), test_name, records_number, result, options)
     if return_time:
-        return execution_time
+        return result.avg_execution_time
+
+backends = BackendRegistry()
+backends.register("postgres", run_postgres, ["psycopg2", "psycopg2.extras", "psycopg2.pool"])
+backends.register("mongo", run_mongo, ["pymongo", "bson"])
+backends.register("cassandra", run_cassandra, ["cassandra.cluster", "cassandra.concurrent"])
+backends.register("mariadb", run_mariadb, ["mariadb"])
 
 test_names = ["insert_base", 
               "insert_multi", 
@@ -263,12 +975,62 @@ test_names = ["insert_base",
               "select"
             ]
 
+def add_benchmark_arguments(parser):
+    """Options shared by the single-run CLI and the sweep runner."""
+    parser.add_argument("--executions_num", type=int, default=1, help="Number of times to execute the entire set of queries.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Number of workers, each with its own connection.")
+    parser.add_argument("--target-qps", type=float, default=None, help="Cap the aggregate rate of all workers (queries per second).")
+    parser.add_argument("--fetch-mode", type=str, default="all", choices=FETCH_MODES, help="How much of a select result to pull to the client.")
+    parser.add_argument("--fetch-size", type=int, default=1000, help="Rows per round trip in the stream fetch mode: PostgreSQL server-side cursor itersize, MariaDB/Mongo batch, Cassandra page size.")
+    parser.add_argument("--cassandra-window", type=int, default=None, help="Run Cassandra queries with execute_async, keeping up to N requests in flight.")
+    parser.add_argument("--query-mode", type=str, default="literal", choices=QUERY_MODES, help="Inline values into one SQL/CQL string, send a statement template with a parameter stream, or COPY (PostgreSQL insert tests).")
+    parser.add_argument("--pool-size", type=int, default=4, help="Connections per pooled database (at least --concurrency).")
+    parser.add_argument("--warm-up", action="store_true", help="Open and ping all pooled connections before the timed run.")
+    parser.add_argument("--chunk-rows", type=int, default=None, help="Split large writes into chunks of at most N rows (default: per database).")
+    parser.add_argument("--chunk-bytes", type=int, default=None, help="Split large writes into chunks of at most N bytes (default: per database).")
+    parser.add_argument("--transaction-mode", type=str, default="single", choices=TRANSACTION_MODES, help="SQL tests: one uncommitted transaction, a commit per iteration (commit time reported separately), a rollback to a savepoint per iteration, or autocommit.")
+    parser.add_argument("--trace-allocations", action="store_true", help="Count client allocations with tracemalloc during the timed region (slows the client down).")
+    parser.add_argument("--server-stats", action="store_true", help="After the run, collect plans and statement statistics from the server (EXPLAIN/ANALYZE, pg_stat_statements, performance_schema, Mongo explain, Cassandra tracing) and store them with the result.")
+    parser.add_argument("--mongo-write", type=str, default="insert_many", choices=MONGO_WRITES, help="Mongo insert tests: ordered insert_many, or an unordered bulk_write per chunk (batch size from --chunk-rows).")
+    parser.add_argument("--mongo-raw", action="store_true", help="Mongo insert tests: encode the documents to RawBSONDocument before the timed run and report the encoding time separately.")
+    parser.add_argument("--import-time", action="store_true", help="Report how long the driver and plotting imports took.")
+    parser.add_argument("--copy-buffer", type=str, default="stream", choices=COPY_BUFFERS, help="Render COPY rows lazily while streaming, or into an in-memory buffer before timing.")
+
+
+def report_import_times():
+    for name, seconds in LazyModule.import_times.items():
+        print(f"Import of {name}: {seconds:.3f}s")
+    skipped = [name for name in backends.modules() if name not in LazyModule.import_times]
+    if skipped:
+        print(f"Not imported: {', '.join(skipped)}")
+
+
+def options_from_args(args):
+    return BenchmarkOptions(concurrency=args.concurrency, target_qps=args.target_qps,
+                            fetch_mode=args.fetch_mode, fetch_size=args.fetch_size,
+                            cassandra_window=args.cassandra_window, query_mode=args.query_mode,
+                            copy_buffer=args.copy_buffer, chunk_rows=args.chunk_rows,
+                            chunk_bytes=args.chunk_bytes, transaction_mode=args.transaction_mode,
+                            trace_allocations=args.trace_allocations, server_stats=args.server_stats,
+                            mongo_write=args.mongo_write, mongo_raw=args.mongo_raw)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Database query execution script.")
-    parser.add_argument("--db_type", type=str, required=True, choices=["postgres", "mongo", "cassandra", "mariadb"], help="Type of the database.")
+    parser.add_argument("--db_type", type=str, required=True, choices=list(backends), help="Type of the database.")
     parser.add_argument("--records_num", type=int, default=1, help="Number of records to retrieve.")
     parser.add_argument("--test_name", type=str, required=True, choices=test_names, help="Type of the queries to execute.")
-    parser.add_argument("--executions_num", type=int, default=1, help="Number of times to execute the entire set of queries.")
+    parser.add_argument("--no-plot", action="store_true", help="Only record the result, without rendering the plots.")
+    add_benchmark_arguments(parser)
     args = parser.parse_args()
 
-    main(args.db_type, args.records_num, args.test_name, args.executions_num)
+    options = options_from_args(args)
+    registry = ConnectionRegistry(pool_size=args.pool_size, warm_up=args.warm_up)
+    try:
+        main(args.db_type, args.records_num, args.test_name, args.executions_num, options, registry)
+    finally:
+        registry.close_all()
+    if not args.no_plot:
+        render_plots(args.test_name)
+    if args.import_time:
+        report_import_times()
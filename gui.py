@@ -1,16 +1,65 @@
 import sys
-import os
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-import csv
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QComboBox, QSpinBox, QPushButton, QGroupBox,
-    QMessageBox, QSplitter, QSizePolicy
+    QMessageBox, QSplitter, QSizePolicy, QListWidget
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from db_connection import main, test_names, backends, load_database_credentials, results
+from BenchmarkOptions import BenchmarkOptions
+from ConnectionRegistry import ConnectionRegistry
+from RunMonitor import BenchmarkCancelled, RunMonitor
+from SeriesCache import SeriesCache
+
+LIVE_PLOT_INTERVAL_MS = 250
+
+
+class BenchmarkSignals(QObject):
+    iteration = pyqtSignal(int, int, float)
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+    cancelled = pyqtSignal(int)
+
+
+class BenchmarkJob(QRunnable):
+    """One benchmark run on the GUI thread pool; iterations and the outcome are reported through signals."""
+
+    def __init__(self, run_id, db_type, test_name, records_num, executions_num, registry):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.run_id = run_id
+        self.db_type = db_type
+        self.test_name = test_name
+        self.records_num = records_num
+        self.executions_num = executions_num
+        self.registry = registry
+        self.signals = BenchmarkSignals()
+        self.item_row = None
+        self.monitor = RunMonitor(lambda completed, latency: self.signals.iteration.emit(run_id, completed, latency))
+
+    @property
+    def label(self):
+        return f"#{self.run_id} {self.db_type} {self.test_name} x{self.records_num}"
+
+    def run(self):
+        if self.monitor.cancelled:
+            self.signals.cancelled.emit(self.run_id)
+            return
+        try:
+            run = backends.load(self.db_type)
+            credentials = load_database_credentials()
+            exec_time = run(credentials, self.records_num, self.test_name, self.executions_num, return_time=True,
+                            options=BenchmarkOptions(monitor=self.monitor), registry=self.registry)
+        except BenchmarkCancelled:
+            self.signals.cancelled.emit(self.run_id)
+        except Exception as e:
+            self.signals.failed.emit(self.run_id, str(e))
+        else:
+            self.signals.finished.emit(self.run_id, exec_time)
 
-from db_connection import main, test_names, run_postgres, run_mongo, run_cassandra, run_mariadb, load_database_credentials
 
 class PlotCanvas(FigureCanvas):
     def __init__(self, parent=None, width=10, height=6, dpi=100):
@@ -22,62 +71,83 @@ class PlotCanvas(FigureCanvas):
                                   QSizePolicy.Expanding,
                                   QSizePolicy.Expanding)
         FigureCanvas.updateGeometry(self)
+        self.cache = SeriesCache(results, "avg")
+        # line artists of the current view, updated in place while the view stays the same
+        self.view = None
+        self.lines = {}
 
-    def plot_results(self, test_name):
+    def _reset(self, view, xlabel, ylabel, title):
         self.axes.clear()
-        folder_path = f"./results/{test_name}/"
+        self.view = view
+        self.lines = {}
+        self.axes.set_xlabel(xlabel)
+        self.axes.set_ylabel(ylabel)
+        self.axes.set_title(title)
+        self.axes.grid(True)
 
-        if not os.path.exists(folder_path):
-            self.axes.set_title("No results available")
-            self.draw()
-            return False
+    def _update_lines(self, series, **style):
+        """Set the data of the lines in `series` ({label: (x_vals, y_vals)}), adding lines for new labels."""
+        added = False
+        for label, (x_vals, y_vals) in series.items():
+            line = self.lines.get(label)
+            if line is None:
+                self.lines[label], = self.axes.plot(x_vals, y_vals, label=label, **style)
+                added = True
+            else:
+                line.set_data(x_vals, y_vals)
 
-        all_files = [f for f in os.listdir(folder_path) if f.endswith(".csv")]
+        if added:
+            self.axes.legend()
+            self.fig.tight_layout()
+        self.axes.relim()
+        self.axes.autoscale_view()
+        self.draw_idle()
 
-        if not all_files:
+    def plot_results(self, test_name):
+        changed = self.cache.refresh(test_name)
+        series = self.cache.get(test_name)
+
+        if not series:
+            self.axes.clear()
+            self.view = None
+            self.lines = {}
             self.axes.set_title("No results available")
             self.draw()
             return False
 
-        for filename in all_files:
-            full_path = os.path.join(folder_path, filename)
-            db_label = filename.replace(".csv", "")
-
-            x_vals = []
-            y_vals = []
-
-            with open(full_path, "r") as f:
-                reader = csv.reader(f)
-                for row in reader:
-                    try:
-                        x_vals.append(int(row[0]))
-                        y_vals.append(float(row[1]))
-                    except (ValueError, IndexError):
-                        continue
-
-            if not x_vals or not y_vals:
-                continue
-
-            sorted_pairs = sorted(zip(x_vals, y_vals), key=lambda pair: pair[0])
-            if sorted_pairs:
-                x_vals, y_vals = zip(*sorted_pairs)
-                self.axes.plot(x_vals, y_vals, marker='o', label=db_label)
-
-        self.axes.set_xlabel("Number of Records")
-        self.axes.set_ylabel("Execution Time (s)")
-        self.axes.set_title(f"Execution Time Comparison for Test: {test_name}")
-        self.axes.legend()
-        self.axes.grid(True)
-
-        self.fig.tight_layout()
-        self.draw()
+        if self.view != ("results", test_name):
+            self._reset(("results", test_name), "Number of Records", "Execution Time (s)",
+                        f"Execution Time Comparison for Test: {test_name}")
+            changed = set(series)
+        if changed:
+            self._update_lines({label: tuple(zip(*series[label])) for label in changed}, marker='o')
         return True
 
+    def plot_live(self, samples):
+        """Plot the latency of every iteration received so far, one line per running benchmark."""
+        if self.view != ("live",):
+            self._reset(("live",), "Iteration", "Latency (s)", "Live Iteration Latency")
+        changed = {label: (range(1, len(latencies) + 1), latencies) for label, latencies in samples.items()
+                   if label not in self.lines or len(self.lines[label].get_xdata()) != len(latencies)}
+        if changed:
+            self._update_lines(changed)
+
 class DatabaseBenchmarkGUI(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Database Benchmark Tool")
         self.setGeometry(100, 100, 1000, 600)
+        self.registry = ConnectionRegistry()
+        # one thread per database, so queued runs on different databases execute concurrently
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(len(list(backends)))
+        self.jobs = {}
+        self.samples = {}
+        self.next_run_id = 0
+        self.live_plot_dirty = False
+        self.live_plot_timer = QTimer(self)
+        self.live_plot_timer.timeout.connect(self.refresh_live_plot)
+        self.live_plot_timer.start(LIVE_PLOT_INTERVAL_MS)
 
         self.setStyleSheet("""
             QMainWindow {
@@ -144,7 +214,7 @@ class DatabaseBenchmarkGUI(QMainWindow):
         db_type_layout = QHBoxLayout()
         db_type_label = QLabel("Database Type:")
         self.db_type_combo = QComboBox()
-        self.db_type_combo.addItems(["postgres", "mongo", "cassandra", "mariadb"])
+        self.db_type_combo.addItems(list(backends))
         self.db_type_combo.setMinimumWidth(180)
         db_type_layout.addWidget(db_type_label)
         db_type_layout.addWidget(self.db_type_combo)
@@ -185,8 +255,20 @@ class DatabaseBenchmarkGUI(QMainWindow):
         self.run_button.setMinimumWidth(140)
         self.run_button.clicked.connect(self.run_benchmark)
         buttons_layout.addWidget(self.run_button)
+        self.run_all_button = QPushButton("Run All Databases")
+        self.run_all_button.clicked.connect(self.run_all_databases)
+        buttons_layout.addWidget(self.run_all_button)
         db_layout.addLayout(buttons_layout)
 
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_runs)
+        db_layout.addWidget(self.cancel_button)
+
+        self.queue_list = QListWidget()
+        self.queue_list.setMinimumHeight(120)
+        db_layout.addWidget(self.queue_list)
+
         self.exec_time_label = QLabel("Execution Time: -")
         self.num_queries_label = QLabel("Number of Queries: -")
         self.exec_time_label.setStyleSheet("font-size: 13px; color: #b0b0b0;")
@@ -216,37 +298,83 @@ class DatabaseBenchmarkGUI(QMainWindow):
         right_panel.setLayout(right_layout)
 
     def run_benchmark(self):
-        db_type = self.db_type_combo.currentText()
-        test_name = self.test_combo.currentText()
-        records_num = self.records_spin.value()
-        executions_num = self.executions_spin.value()
-
-        try:
-            credentials = load_database_credentials()
-            exec_time = None
-            if db_type == "postgres":
-                exec_time = run_postgres(credentials, records_num, test_name, executions_num, return_time=True)
-            elif db_type == "mongo":
-                exec_time = run_mongo(credentials, records_num, test_name, executions_num, return_time=True)
-            elif db_type == "cassandra":
-                exec_time = run_cassandra(credentials, records_num, test_name, executions_num, return_time=True)
-            elif db_type == "mariadb":
-                exec_time = run_mariadb(credentials, records_num, test_name, executions_num, return_time=True)
-
-            if exec_time is not None:
-                self.exec_time_label.setText(f"Execution Time: {exec_time:.4f} s")
-            else:
-                self.exec_time_label.setText("Execution Time: -")
-            self.num_queries_label.setText(f"Number of Queries: {records_num}")
-
-            QMessageBox.information(self, "Success",
-                                    f"Benchmark completed successfully for {db_type} with {records_num} records.")
-
-            self.plot_results()
-        except Exception as e:
+        self.queue_run(self.db_type_combo.currentText())
+
+    def run_all_databases(self):
+        for db_type in backends:
+            self.queue_run(db_type)
+
+    def queue_run(self, db_type):
+        job = BenchmarkJob(self.next_run_id, db_type, self.test_combo.currentText(), self.records_spin.value(),
+                           self.executions_spin.value(), self.registry)
+        self.next_run_id += 1
+        job.signals.iteration.connect(self.on_iteration)
+        job.signals.finished.connect(self.on_finished)
+        job.signals.failed.connect(self.on_failed)
+        job.signals.cancelled.connect(self.on_cancelled)
+
+        job.item_row = self.queue_list.count()
+        self.queue_list.addItem(f"{job.label}: queued")
+        self.jobs[job.run_id] = job
+        self.samples[job.label] = []
+        self.cancel_button.setEnabled(True)
+        self.thread_pool.start(job)
+
+    def set_status(self, job, status):
+        self.queue_list.item(job.item_row).setText(f"{job.label}: {status}")
+
+    def on_iteration(self, run_id, completed, latency):
+        job = self.jobs[run_id]
+        self.samples[job.label].append(latency)
+        self.set_status(job, f"running {completed}/{job.executions_num}")
+        self.live_plot_dirty = True
+
+    def refresh_live_plot(self):
+        if self.live_plot_dirty:
+            self.live_plot_dirty = False
+            self.canvas.plot_live(self.samples)
+
+    def on_finished(self, run_id, exec_time):
+        job = self.jobs[run_id]
+        if exec_time is not None:
+            self.exec_time_label.setText(f"Execution Time: {exec_time:.4f} s")
+            self.set_status(job, f"done, {exec_time:.4f} s")
+        else:
             self.exec_time_label.setText("Execution Time: -")
-            self.num_queries_label.setText("Number of Queries: -")
-            QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}")
+            self.set_status(job, "done")
+        self.num_queries_label.setText(f"Number of Queries: {job.records_num}")
+        self.finish_job(job)
+
+    def on_failed(self, run_id, error):
+        job = self.jobs[run_id]
+        self.set_status(job, "failed")
+        self.finish_job(job)
+        QMessageBox.critical(self, "Error", f"An error occurred in {job.label}: {error}")
+
+    def on_cancelled(self, run_id):
+        job = self.jobs[run_id]
+        self.set_status(job, "cancelled")
+        self.finish_job(job)
+
+    def finish_job(self, job):
+        del self.jobs[job.run_id]
+        if not self.jobs:
+            self.cancel_button.setEnabled(False)
+            self.samples = {}
+            self.live_plot_dirty = False
+            self.plot_results()
+
+    def cancel_runs(self):
+        for job in self.jobs.values():
+            job.monitor.cancel()
+            self.set_status(job, "cancelling")
+
+    def closeEvent(self, event):
+        for job in self.jobs.values():
+            job.monitor.cancel()
+        self.thread_pool.waitForDone()
+        self.registry.close_all()
+        super().closeEvent(event)
 
     def plot_results(self):
         test_name = self.test_combo.currentText()
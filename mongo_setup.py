@@ -0,0 +1,296 @@
+import csv
+import itertools
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pymongo import ASCENDING, IndexModel, MongoClient, UpdateOne
+import argparse
+from tqdm import tqdm
+import sys
+
+from datetime_script import generate_epoch_millis
+from OrderTable import OrderTable
+from csv_ingest import iter_chunks, parse_int_csv, parse_numeric_columns
+
+# the fields get_mongo_queries filters, joins and updates on; none is unique, insert tests add duplicates
+INDEXES = {
+    "orders": ["order_id", "user_id", "order_datetime", "products.product_id"],
+    "products": ["product_id", "aisle_id", "department_id"],
+    "aisles": ["aisle_id"],
+    "departments": ["department_id"],
+    "users": ["user_id"],
+}
+
+
+def insert_concurrently(collection, documents, concurrency=8, batch_docs=10000):
+    """
+    Insert `documents` with unordered insert_many batches of `batch_docs` documents, keeping up to
+    `concurrency` batches in flight, and report docs/s. Returns the number of documents inserted.
+    """
+    documents = iter(documents)
+    count = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = deque()
+        for batch in iter(lambda: list(itertools.islice(documents, batch_docs)), []):
+            pending.append(executor.submit(collection.insert_many, batch, ordered=False))
+            count += len(batch)
+            if len(pending) >= 2 * concurrency:
+                pending.popleft().result()
+        while pending:
+            pending.popleft().result()
+    elapsed = time.perf_counter() - start
+
+    print(f"Loaded {count} documents into {collection.name} in {elapsed:.1f}s "
+          f"({count / max(elapsed, 1e-9):.0f} docs/s)")
+    return count
+
+
+def read_csv_documents(database, data_dir, collection_name, convert, concurrency=8, batch_docs=10000):
+    """Load `<collection_name>.csv` into a fresh collection, `convert(row)` making a document of a CSV row."""
+    print(f"Loading {collection_name} data...")
+    csv_file = os.path.join(data_dir, f"{collection_name}.csv")
+
+    if not os.path.exists(csv_file):
+        print(f"Error: {csv_file} not found!")
+        return 0
+
+    database.drop_collection(collection_name)
+    with open(csv_file, 'r', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        next(reader)
+
+        documents = (convert(row) for row in tqdm(reader, desc=collection_name.capitalize()))
+        return insert_concurrently(database[collection_name], documents, concurrency, batch_docs)
+
+
+def load_aisles(database, data_dir, concurrency=8, batch_docs=10000):
+    read_csv_documents(database, data_dir, "aisles", lambda row: {"aisle_id": int(row[0]), "aisle": row[1]},
+                       concurrency, batch_docs)
+
+
+def load_departments(database, data_dir, concurrency=8, batch_docs=10000):
+    read_csv_documents(database, data_dir, "departments",
+                       lambda row: {"department_id": int(row[0]), "department": row[1]}, concurrency, batch_docs)
+
+
+def load_products(database, data_dir, concurrency=8, batch_docs=10000):
+    read_csv_documents(database, data_dir, "products", lambda row: {
+        "product_id": int(row[0]),
+        "product_name": row[1],
+        "aisle_id": int(row[2]),
+        "department_id": int(row[3])
+    }, concurrency, batch_docs)
+
+
+def read_orders(data_dir, order_table_path=None, workers=None):
+    """Parse orders.csv into an OrderTable, to be joined with the order products."""
+    print("Reading orders data...")
+    orders_file = os.path.join(data_dir, "orders.csv")
+
+    if not os.path.exists(orders_file):
+        print(f"Error: {orders_file} not found!")
+        return None
+
+    order_table = OrderTable(path=order_table_path)
+    for chunk in iter_chunks(orders_file, parse_numeric_columns, [0, 1, 3, 4, 5, 6], workers=workers, desc="Orders"):
+        order_table.set_many(chunk[:, 0], user_id=chunk[:, 1], order_number=chunk[:, 2], order_dow=chunk[:, 3],
+                             order_timestamp=generate_epoch_millis(chunk[:, 4], chunk[:, 5]),
+                             days_since_prior_order=chunk[:, 5])
+    order_table.flush()
+
+    print(f"Read {len(order_table)} orders")
+    return order_table
+
+
+def order_document(order_id, info, index, products):
+    return {
+        "order_id": order_id,
+        "user_id": info["user_id"][index],
+        "order_number": info["order_number"][index],
+        "order_dow": info["order_dow"][index],
+        "order_datetime": info["order_datetime"][index],
+        "days_since_prior_order": info["days_since_prior_order"][index],
+        "products": products
+    }
+
+
+def order_documents(chunks, order_table, product_names, loaded, late_products):
+    """
+    Join `(order_id, product_id, add_to_cart_order, reordered)` rows with the orders in `order_table`
+    into order documents with embedded products. Rows of one order are expected next to each other,
+    as in the Instacart files (sorted by order_id); products of an order met again later are
+    collected in `late_products` to be pushed after the load. `loaded` marks the orders written.
+    """
+    carry = np.empty((0, 4), dtype=np.int64)
+    missing = 0
+    for columns in itertools.chain(chunks, [None]):
+        last_chunk = columns is None
+        columns = carry if last_chunk else np.concatenate([carry, columns])
+        if not len(columns):
+            continue
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(columns[:, 0])) + 1])
+        if not last_chunk:
+            # the last order of a chunk may continue in the next one
+            columns, carry = columns[:starts[-1]], columns[starts[-1]:]
+            starts = starts[:-1]
+        if not len(starts):
+            continue
+
+        info = order_table.lookup(columns[starts, 0])
+        present = info.pop("present").tolist()
+        info["order_datetime"] = info.pop("order_timestamp").astype("datetime64[ms]")
+        info = {name: column.tolist() for name, column in info.items()}
+        rows = columns.tolist()
+        ends = starts[1:].tolist() + [len(rows)]
+        for index, (start, end) in enumerate(zip(starts.tolist(), ends)):
+            order_id = rows[start][0]
+            if not present[index]:
+                missing += end - start
+                continue
+            products = [{
+                "product_id": product_id,
+                "product_name": product_names.get(product_id, "Unknown Product"),
+                "add_to_cart_order": add_to_cart_order,
+                "reordered": reordered
+            } for _, product_id, add_to_cart_order, reordered in rows[start:end]]
+            if loaded[order_id]:
+                late_products.setdefault(order_id, []).extend(products)
+                continue
+            loaded[order_id] = True
+            yield order_document(order_id, info, index, products)
+
+    if missing:
+        print(f"Warning: No order data found for {missing} order products rows")
+
+
+def orders_without_products(order_table, loaded, slice_orders=1 << 20):
+    """Documents of the orders in `order_table` not marked in `loaded`, with an empty products list."""
+    for first in range(0, order_table.capacity, slice_orders):
+        order_ids = np.arange(first, min(first + slice_orders, order_table.capacity))
+        info = order_table.lookup(order_ids)
+        remaining = np.flatnonzero(info.pop("present") & ~loaded[order_ids])
+        info["order_datetime"] = info.pop("order_timestamp").astype("datetime64[ms]")
+        info = {name: column[remaining].tolist() for name, column in info.items()}
+        for index, order_id in enumerate(order_ids[remaining].tolist()):
+            yield order_document(order_id, info, index, [])
+
+
+def load_orders(database, data_dir, order_table, concurrency=8, batch_docs=10000, workers=None):
+    print("Loading orders with their products...")
+    order_products_file = os.path.join(data_dir, "orders_products.csv")
+
+    if order_table is None:
+        print("Error: No order data available, orders.csv is needed to build the order documents!")
+        return
+
+    print("Loading product names into memory...")
+    product_names = {document["product_id"]: document["product_name"]
+                     for document in database.products.find({}, {"_id": 0, "product_id": 1, "product_name": 1})}
+    print(f"Loaded {len(product_names)} product names")
+
+    database.drop_collection("orders")
+    orders = database.orders
+    loaded = np.zeros(order_table.capacity, dtype=np.bool_)
+    late_products = {}
+    total_count = 0
+
+    if os.path.exists(order_products_file):
+        chunks = iter_chunks(order_products_file, parse_int_csv, 4, workers=workers,
+                             desc=os.path.basename(order_products_file))
+        total_count += insert_concurrently(
+            orders, order_documents(chunks, order_table, product_names, loaded, late_products), concurrency,
+            batch_docs)
+    else:
+        print(f"Warning: {order_products_file} not found, orders are loaded without products")
+
+    print("Loading orders without products...")
+    total_count += insert_concurrently(orders, orders_without_products(order_table, loaded), concurrency, batch_docs)
+
+    if late_products:
+        print(f"Adding products of {len(late_products)} orders whose rows were not contiguous...")
+        orders.bulk_write([UpdateOne({"order_id": order_id}, {"$push": {"products": {"$each": products}}})
+                           for order_id, products in late_products.items()], ordered=False)
+
+    print(f"Loaded {total_count} orders in total")
+
+
+def load_users(database, concurrency=8, batch_docs=10000):
+    print("Loading users data...")
+
+    database.drop_collection("users")
+    documents = ({"user_id": user_id, "name": f"User{user_id}"} for user_id in tqdm(range(1, 206210), desc="Users"))
+    insert_concurrently(database.users, documents, concurrency, batch_docs)
+
+
+def create_indexes(database):
+    """Build the indexes after the load: one index build is cheaper than updating them on every insert."""
+    print("Creating indexes...")
+
+    for collection_name, fields in INDEXES.items():
+        start = time.perf_counter()
+        database[collection_name].create_indexes([IndexModel([(field, ASCENDING)]) for field in fields])
+        print(f"Indexed {collection_name} ({', '.join(fields)}) in {time.perf_counter() - start:.1f}s")
+
+    print("Indexes created successfully")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the Instacart dataset into MongoDB collections.")
+    parser.add_argument("--host", default="localhost", help="MongoDB host")
+    parser.add_argument("--port", type=int, default=27017, help="MongoDB port")
+    parser.add_argument("--database", default="instacart", help="Database name")
+    parser.add_argument("--data-dir", required=True, help="Directory containing the Instacart CSV files")
+    parser.add_argument("--skip-indexes", action="store_true", help="Skip index creation")
+    parser.add_argument("--skip-aisles", action="store_true", help="Skip loading aisles data")
+    parser.add_argument("--skip-departments", action="store_true", help="Skip loading departments data")
+    parser.add_argument("--skip-products", action="store_true", help="Skip loading products data")
+    parser.add_argument("--skip-orders", action="store_true", help="Skip loading orders and their products")
+    parser.add_argument("--skip-users", action="store_true", help="Skip loading users data")
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of insert_many batches kept in flight while loading")
+    parser.add_argument("--batch-docs", type=int, default=10000, help="Documents per unordered insert_many batch")
+    parser.add_argument("--order-table-path", default=None, help="Directory for a memory-mapped order lookup table")
+    parser.add_argument("--workers", type=int, default=None, help="Number of CSV parsing processes (default: CPU count)")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data_dir):
+        print(f"Error: Data directory {args.data_dir} does not exist.")
+        sys.exit(1)
+
+    print(f"Connecting to MongoDB at {args.host}:{args.port}...")
+    client = MongoClient(args.host, args.port, maxPoolSize=max(args.concurrency, 100))
+    database = client[args.database]
+
+    try:
+        if not args.skip_aisles:
+            load_aisles(database, args.data_dir, args.concurrency, args.batch_docs)
+
+        if not args.skip_departments:
+            load_departments(database, args.data_dir, args.concurrency, args.batch_docs)
+
+        if not args.skip_products:
+            load_products(database, args.data_dir, args.concurrency, args.batch_docs)
+
+        if not args.skip_orders:
+            order_table = read_orders(args.data_dir, args.order_table_path, args.workers)
+            load_orders(database, args.data_dir, order_table, args.concurrency, args.batch_docs, args.workers)
+
+        if not args.skip_users:
+            load_users(database, args.concurrency, args.batch_docs)
+
+        if not args.skip_indexes:
+            create_indexes(database)
+
+        print("Data loading completed successfully.")
+
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
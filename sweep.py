@@ -0,0 +1,93 @@
+import argparse
+import json
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from ConnectionRegistry import ConnectionRegistry
+from db_connection import (add_benchmark_arguments, backends, load_database_credentials, options_from_args,
+                           render_plots, report_import_times, test_names)
+
+
+def load_spec(args):
+    """Build the sweep matrix from the command line, overridden by a JSON spec file if one is given."""
+    spec = {
+        "databases": args.databases,
+        "tests": args.tests,
+        "records": args.records,
+        "executions_num": args.executions_num,
+    }
+    if args.spec:
+        with open(args.spec, "r") as file:
+            spec.update(json.load(file))
+
+    unknown = [db_type for db_type in spec["databases"] if db_type not in backends]
+    unknown += [test_name for test_name in spec["tests"] if test_name not in test_names]
+    if unknown:
+        raise ValueError(f"Unknown databases or tests in sweep spec: {unknown}")
+    return spec
+
+
+def run_database(db_type, run, spec, credentials, options, registry):
+    """Run every (test, records) cell for one database; results are saved as each cell completes."""
+    failed = []
+    for test_name in spec["tests"]:
+        for records_number in spec["records"]:
+            print(f"[{db_type}] {test_name} records={records_number}")
+            try:
+                run(credentials, records_number, test_name, spec["executions_num"], options=options,
+                    registry=registry)
+            except Exception:
+                traceback.print_exc()
+                failed.append((test_name, records_number))
+    return failed
+
+
+def sweep(spec, options, registry, sequential=False):
+    """
+    Run the matrix with one thread per database, so independent databases are benchmarked in parallel.
+    Memory and allocation figures are per process, so with `sequential` (implied by
+    `options.trace_allocations`) the databases run one after another to keep them apart.
+    """
+    credentials = load_database_credentials()
+    databases = spec["databases"]
+    # import all drivers up front, so a missing one fails the sweep before anything runs
+    runners = {db_type: backends.load(db_type) for db_type in databases}
+    sequential = sequential or options.trace_allocations
+    with ThreadPoolExecutor(max_workers=1 if sequential else len(databases)) as executor:
+        futures = {db_type: executor.submit(run_database, db_type, runners[db_type], spec, credentials, options,
+                                            registry)
+                   for db_type in databases}
+        return {db_type: future.result() for db_type, future in futures.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a databases x tests x record counts benchmark matrix.")
+    parser.add_argument("--databases", nargs="+", default=list(backends), choices=list(backends), help="Databases to benchmark.")
+    parser.add_argument("--tests", nargs="+", default=["select_base"], choices=test_names, help="Tests to run on every database.")
+    parser.add_argument("--records", nargs="+", type=int, default=[1, 10, 100, 1000], help="Record-count series.")
+    parser.add_argument("--spec", type=str, default=None, help="JSON file with databases/tests/records/executions_num keys.")
+    parser.add_argument("--no-plot", action="store_true", help="Only record the results, without rendering the plots.")
+    parser.add_argument("--sequential", action="store_true", help="Run the databases one after another, so client memory figures do not mix (implied by --trace-allocations).")
+    add_benchmark_arguments(parser)
+    args = parser.parse_args()
+
+    spec = load_spec(args)
+    options = options_from_args(args)
+    registry = ConnectionRegistry(pool_size=args.pool_size, warm_up=args.warm_up)
+    start = time.perf_counter()
+    try:
+        failures = sweep(spec, options, registry, args.sequential)
+    finally:
+        registry.close_all()
+    if not args.no_plot:
+        for test_name in spec["tests"]:
+            render_plots(test_name)
+    if args.import_time:
+        report_import_times()
+
+    cells = len(spec["databases"]) * len(spec["tests"]) * len(spec["records"])
+    print(f"Sweep of {cells} cells finished in {time.perf_counter() - start:.2f} s")
+    for db_type, failed in failures.items():
+        for test_name, records_number in failed:
+            print(f"Failed: {db_type} {test_name} records={records_number}")